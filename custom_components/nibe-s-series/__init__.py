@@ -8,14 +8,32 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.typing import ConfigType
 
-from pymodbus.client import AsyncModbusTcpClient
-
 from .const import (
     CONF_HOST_NAME,
     CONF_HOST_PORT,
+    CONF_MAX_IN_FLIGHT,
+    CONF_MODEL,
+    CONF_READ_GAP,
+    CONF_RECORD_TRAFFIC,
+    CONF_SLAVE,
+    CONF_SUPPORTED,
+    CONF_UNSUPPORTED,
+    DATA_CONNECTIONS,
+    DATA_PHASES,
+    DEFAULT_MAX_IN_FLIGHT,
+    DEFAULT_MODEL,
+    DEFAULT_READ_GAP,
+    DEFAULT_RECORD_TRAFFIC,
+    DEFAULT_SLAVE,
     DOMAIN,
     PLATFORMS,
 )
+from .helpers.connection import ConnectionPool
+from .helpers.phases import PollPhases
+from .helpers.register_map import RegisterMap, async_load_register_map
+from .helpers.services import async_register_services
+from .helpers.snapshot import RegisterSnapshot
+from . import climate, sensor
 
 _LOGGER: logging.Logger = logging.getLogger(__package__)
 
@@ -23,6 +41,7 @@ _LOGGER: logging.Logger = logging.getLogger(__package__)
 async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     """Set up the integration using YAML (not supported)."""
     _LOGGER.debug("async_setup: YAML configuration is not supported")
+    async_register_services(hass)
     return True
 
 
@@ -30,24 +49,150 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up this integration from a configuration entry."""
     _LOGGER.debug("Setting up entry: %s", entry.title)
 
-    host_name = entry.data.get(CONF_HOST_NAME)
-    host_port = int(entry.data.get(CONF_HOST_PORT))
-    client = AsyncModbusTcpClient(host_name, port=host_port)
+    host_name = get_parameter(entry, CONF_HOST_NAME)
+    host_port = int(get_parameter(entry, CONF_HOST_PORT))
+    slave = int(get_parameter(entry, CONF_SLAVE, DEFAULT_SLAVE))
+    read_gap = int(get_parameter(entry, CONF_READ_GAP, DEFAULT_READ_GAP))
+    max_in_flight = int(
+        get_parameter(entry, CONF_MAX_IN_FLIGHT, DEFAULT_MAX_IN_FLIGHT)
+    )
+    register_map = await async_load_register_map(
+        hass, get_parameter(entry, CONF_MODEL, DEFAULT_MODEL)
+    )
 
     if DOMAIN not in hass.data:
         hass.data[DOMAIN] = {}
+    if DATA_CONNECTIONS not in hass.data:
+        hass.data[DATA_CONNECTIONS] = ConnectionPool(hass)
+    if DATA_PHASES not in hass.data:
+        hass.data[DATA_PHASES] = PollPhases()
+
+    # Entries on the same gateway share its connection and request scheduler
+    pool = hass.data[DATA_CONNECTIONS]
+    connection = pool.acquire(host_name, host_port, slave, max_in_flight)
+    coordinator = NibeCoordinator(
+        hass,
+        connection,
+        slave=slave,
+        read_gap=read_gap,
+        max_in_flight=max_in_flight,
+        snapshot=_register_snapshot(hass, entry),
+        register_map=register_map,
+    )
+    coordinator.entry_options = dict(entry.options)
+    if get_parameter(entry, CONF_RECORD_TRAFFIC, DEFAULT_RECORD_TRAFFIC):
+        coordinator.start_recording(
+            hass.config.path(f"{DOMAIN}_{entry.entry_id}.trace")
+        )
+    restored = await coordinator.async_restore_snapshot()
+    # With restored values the spans not probed yet are kept until they are
+    # probed after setup
+    coordinator.register_map = await _async_supported_map(
+        hass, entry, coordinator, register_map, probe=not restored
+    )
+    # The thermostat and alarm registers are read before the platforms are
+    # set up, everything else fills in over the following polls
+    coordinator.startup_spans = [
+        (decoding.register_type, decoding.address, decoding.count)
+        for decoding in climate.startup_decodings(coordinator.register_map)
+        + sensor.startup_decodings(coordinator.register_map)
+    ]
+    if not restored:
+        try:
+            await coordinator.async_config_entry_first_refresh()
+        except Exception:
+            coordinator.close()
+            await coordinator.async_stop_recording()
+            pool.release(connection, slave, max_in_flight)
+            raise
 
-    coordinator = NibeCoordinator(hass, client)
-    await coordinator.async_config_entry_first_refresh()
-
-    hass.data[DOMAIN]["coordinator"] = coordinator
+    hass.data[DOMAIN][entry.entry_id] = coordinator
+    hass.data[DATA_PHASES].add(coordinator)
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
     entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+
+    if restored:
+        # Entities start from the restored values, the unit is probed and
+        # read after setup so a slow or unreachable unit does not delay
+        # startup. The probe can reload the entry, so it starts once the
+        # update listener is in place.
+        entry.async_create_background_task(
+            hass,
+            _async_probe_and_refresh(hass, entry, coordinator, register_map),
+            f"{DOMAIN} first refresh",
+        )
     return True
 
 
+async def _async_supported_map(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    coordinator: NibeCoordinator,
+    register_map: RegisterMap,
+    probe: bool = True,
+) -> RegisterMap:
+    """Leave out the entities whose registers the unit does not implement.
+
+    Spans are probed once and the outcome is kept in the entry, so only
+    spans added to the map since are probed at later setups. Without probe
+    the spans not probed yet are kept.
+    """
+    supported = {tuple(span) for span in entry.data.get(CONF_SUPPORTED, [])}
+    unsupported = _unsupported_spans(entry)
+    unprobed = register_map.spans() - supported - unsupported
+    if unprobed and not probe:
+        supported |= unprobed
+    elif unprobed:
+        found = await coordinator.async_probe(unprobed)
+        if found is None:
+            # Keep the entities until the unit can be probed
+            supported |= unprobed
+        else:
+            supported |= found
+            unsupported |= unprobed - found
+            hass.config_entries.async_update_entry(
+                entry,
+                data={
+                    **entry.data,
+                    CONF_SUPPORTED: sorted(supported),
+                    CONF_UNSUPPORTED: sorted(unsupported),
+                },
+            )
+    if unsupported:
+        _LOGGER.debug("Registers not implemented by the unit: %s", sorted(unsupported))
+    return register_map.restricted(supported)
+
+
+async def _async_probe_and_refresh(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    coordinator: NibeCoordinator,
+    register_map: RegisterMap,
+) -> None:
+    """Probe the spans not probed yet, then read the unit.
+
+    Recording unimplemented spans in the entry reloads it, which leaves out
+    their entities.
+    """
+    await _async_supported_map(hass, entry, coordinator, register_map)
+    await coordinator.async_refresh()
+
+
+def _unsupported_spans(entry: ConfigEntry) -> set[tuple]:
+    """Return the spans the unit of an entry does not implement."""
+    return {tuple(span) for span in entry.data.get(CONF_UNSUPPORTED, [])}
+
+
+def _register_snapshot(hass: HomeAssistant, entry: ConfigEntry) -> RegisterSnapshot:
+    """Return the register snapshot of an entry."""
+    host_name = get_parameter(entry, CONF_HOST_NAME)
+    host_port = int(get_parameter(entry, CONF_HOST_PORT))
+    slave = int(get_parameter(entry, CONF_SLAVE, DEFAULT_SLAVE))
+    return RegisterSnapshot(hass, entry.entry_id, f"{host_name}:{host_port}:{slave}")
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a configuration entry."""
     _LOGGER.debug("Unloading entry: %s", entry.title)
@@ -62,15 +207,35 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     )
 
     if unloaded:
-        coordinator = hass.data[DOMAIN].pop("coordinator", None)
+        coordinator = hass.data[DOMAIN].pop(entry.entry_id, None)
         if coordinator is not None:
             coordinator.close()
+            await coordinator.async_stop_recording()
+            hass.data[DATA_CONNECTIONS].release(
+                coordinator.connection, coordinator.slave, coordinator.max_in_flight
+            )
+            hass.data[DATA_PHASES].remove(coordinator)
 
     return unloaded
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the register snapshot of a removed entry."""
+    await _register_snapshot(hass, entry).async_remove()
+
+
 async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Reload a configuration entry."""
+    coordinator = hass.data.get(DOMAIN, {}).get(entry.entry_id)
+    if (
+        coordinator is not None
+        and entry.options == coordinator.entry_options
+        and CONF_SUPPORTED in entry.data
+        and not coordinator.register_map.spans() & _unsupported_spans(entry)
+    ):
+        # Only probe outcomes were recorded, and no entity lost its registers.
+        # Without any outcome the registers are probed again by a reload.
+        return
     _LOGGER.debug("Reloading entry: %s", entry.title)
     await async_unload_entry(hass, entry)
     await async_setup_entry(hass, entry)
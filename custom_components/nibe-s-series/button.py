@@ -4,18 +4,19 @@ from homeassistant.components.button import ButtonEntity
 from homeassistant.core import HomeAssistant
 from homeassistant.util.dt import now as hass_now
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from .const import DOMAIN, NIBE_BUTTONS, BUTTON_CLASS_SET_TIME, BUTTON_CLASS_START
+from .const import DOMAIN, BUTTON_CLASS_SET_TIME, BUTTON_CLASS_START
 from .entity import NibeEntity
 
 _LOGGER = logging.getLogger(__name__)
 
+
 async def async_setup_entry(hass: HomeAssistant, entry, async_add_devices):
     """Setup button platform."""
     _LOGGER.debug("Setting up Nibe buttons")
-    coordinator = hass.data[DOMAIN]["coordinator"]
+    coordinator = hass.data[DOMAIN][entry.entry_id]
 
     buttons = []
-    for button in NIBE_BUTTONS:
+    for button in coordinator.register_map.descriptors("button"):
         if button["entity_class"] == BUTTON_CLASS_START:
             buttons.append(NibeButtonStart(coordinator, button, entry))
         elif button["entity_class"] == BUTTON_CLASS_SET_TIME:
@@ -33,6 +34,10 @@ class NibeButton(NibeEntity, ButtonEntity):
         self.idx = idx
         self._attr_name = idx["name"]
 
+    def register_spans(self):
+        """Buttons only write, they have no registers to poll."""
+        return []
+
 
 class NibeButtonStart(NibeButton):
     """Nibe start button class."""
@@ -40,7 +45,9 @@ class NibeButtonStart(NibeButton):
     async def async_press(self) -> None:
         """Press the button."""
         _LOGGER.debug("Pressing NibeButtonStart: %s", self._attr_name)
-        result = await self.coordinator.write_coil(self.idx["address"], True)
+        result = await self.coordinator.write_coil(
+            self.idx["address"], True, force=True
+        )
         _LOGGER.debug("NibeButtonStart result: %s", result)
 
 
@@ -53,12 +60,11 @@ class NibeButtonSetTime(NibeButton):
 
         now = hass_now()
         try:
-            await self.coordinator.write_register(399, now.year)
-            await self.coordinator.write_register(400, now.month)
-            await self.coordinator.write_register(401, now.day)
-            await self.coordinator.write_register(402, now.hour)
-            await self.coordinator.write_register(403, now.minute)
-            await self.coordinator.write_register(404, now.second)
+            await self.coordinator.write_registers(
+                self.idx["address"],
+                [now.year, now.month, now.day, now.hour, now.minute, now.second],
+                force=True,
+            )
             _LOGGER.debug("Time set successfully: %s", now.isoformat())
         except Exception as e:
             _LOGGER.error("Failed to set time: %s", e)
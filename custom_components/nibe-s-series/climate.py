@@ -18,24 +18,21 @@ from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.typing import ConfigType
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN, NIBE_CLIMATES
+from .const import DOMAIN
 from .entity import NibeEntity
+from .helpers.decoder import Decoding
+from .helpers.register_map import descriptor_decodings
 
 _LOGGER = logging.getLogger(__name__)
 
-NIBE_CLIMATES = [
-    {
-        "name": "Living Room Thermostat",
-        "current_temp_address": 2,
-        "target_temp_address": 1,
-        "hvac_action_address": 28,
-        "hvac_mode_address": 0,
-        "min_temp": 15,
-        "max_temp": 30,
-        "step": 0.5,
-    },
-    # Add more thermostats here if necessary
-]
+
+def startup_decodings(register_map) -> list[Decoding]:
+    """Return the registers of the thermostats, read before setup."""
+    return [
+        decoding
+        for climate in register_map.descriptors("climate")
+        for decoding in descriptor_decodings("climate", climate)
+    ]
 
 
 async def async_setup_entry(
@@ -45,10 +42,11 @@ async def async_setup_entry(
 ) -> None:
     """Setup climate platform."""
     _LOGGER.debug("Setting up Nibe climate thermostats")
-    coordinator = hass.data[DOMAIN]["coordinator"]
+    coordinator = hass.data[DOMAIN][entry.entry_id]
 
     climates = [
-        NibeThermostat(coordinator, climate, entry) for climate in NIBE_CLIMATES
+        NibeThermostat(coordinator, climate, entry)
+        for climate in coordinator.register_map.descriptors("climate")
     ]
     async_add_devices(climates)
 
@@ -72,22 +70,38 @@ class NibeThermostat(NibeEntity, ClimateEntity):
         self._attr_hvac_modes = [HVACMode.HEAT, HVACMode.OFF]
         self._attr_supported_features = ClimateEntityFeature.TARGET_TEMPERATURE
 
+        (
+            self._current_temp,
+            self._target_temp,
+            self._hvac_action,
+            self._hvac_mode,
+        ) = descriptor_decodings("climate", idx)
+
         self._attr_hvac_mode = self._get_hvac_mode()
         self._attr_current_temperature = self._get_current_temperature()
         self._attr_target_temperature = self._get_target_temperature()
         self._attr_hvac_action = self._get_hvac_action()
 
+    def decodings(self):
+        """Return the registers backing the thermostat."""
+        return [
+            self._current_temp,
+            self._target_temp,
+            self._hvac_action,
+            self._hvac_mode,
+        ]
+
     def _get_current_temperature(self):
         """Get the current temperature from the coordinator."""
-        value = self.coordinator.input_registers.get(self.idx["current_temp_address"])
+        value = self._decoded_value(self._current_temp)
         if value is None:
             _LOGGER.warning("Missing current temperature data for %s", self._attr_name)
             return 0
-        return value * 0.1
+        return value
 
     def _get_target_temperature(self):
         """Get the target temperature from the coordinator."""
-        value = self.coordinator.holding_registers.get(self.idx["target_temp_address"])
+        value = self._decoded_value(self._target_temp)
         if value is None:
             _LOGGER.warning("Missing target temperature data for %s", self._attr_name)
             return self._attr_min_temp
@@ -95,7 +109,7 @@ class NibeThermostat(NibeEntity, ClimateEntity):
 
     def _get_hvac_action(self):
         """Get the HVAC action from the coordinator."""
-        action = self.coordinator.input_registers.get(self.idx["hvac_action_address"])
+        action = self._decoded_value(self._hvac_action)
         if action is None:
             _LOGGER.warning("Missing HVAC action data for %s", self._attr_name)
             return HVACAction.IDLE
@@ -103,15 +117,15 @@ class NibeThermostat(NibeEntity, ClimateEntity):
 
     def _get_hvac_mode(self):
         """Get the HVAC mode from the coordinator."""
-        mode = self.coordinator.coils.get(self.idx["hvac_mode_address"])
+        mode = self._decoded_value(self._hvac_mode)
         if mode is None:
             _LOGGER.warning("Missing HVAC mode data for %s", self._attr_name)
             return HVACMode.OFF
         return HVACMode.HEAT if mode else HVACMode.OFF
 
     @callback
-    def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
+    def _handle_registers_update(self) -> None:
+        """Handle changed values in the registers of the entity."""
         self._attr_current_temperature = self._get_current_temperature()
         self._attr_target_temperature = self._get_target_temperature()
         self._attr_hvac_action = self._get_hvac_action()
@@ -134,7 +148,6 @@ class NibeThermostat(NibeEntity, ClimateEntity):
             await self.coordinator.write_coil(self.idx["hvac_mode_address"], True)
         elif hvac_mode == HVACMode.OFF:
             await self.coordinator.write_coil(self.idx["hvac_mode_address"], False)
-        await self.coordinator.async_request_refresh()
 
     async def async_turn_on(self):
         """Turn the entity on."""
@@ -1,9 +1,11 @@
 """Adds config flow for NIBE."""
+import asyncio
 import logging
 from typing import Any, Optional
 
 import voluptuous as vol
 from pymodbus.client import AsyncModbusTcpClient
+from pymodbus.exceptions import ModbusException
 
 from homeassistant import config_entries
 from homeassistant.core import callback
@@ -14,8 +16,27 @@ from .const import (
     CONF_HOST_NAME,
     CONF_HOST_PORT,
     CONF_DEVICE_NAME,
+    CONF_MAX_IN_FLIGHT,
+    CONF_MODEL,
+    CONF_READ_GAP,
+    CONF_RECORD_TRAFFIC,
+    CONF_REPROBE,
+    CONF_SLAVE,
+    CONF_SUPPORTED,
+    CONF_UNSUPPORTED,
+    CONF_WRITE_DELAY,
+    CONF_WRITE_MAX_DELAY,
+    DEFAULT_MAX_IN_FLIGHT,
+    DEFAULT_MODEL,
+    DEFAULT_READ_GAP,
+    DEFAULT_RECORD_TRAFFIC,
+    DEFAULT_SLAVE,
+    DEFAULT_WRITE_DELAY,
+    DEFAULT_WRITE_MAX_DELAY,
     DOMAIN,
 )
+from .helpers.probe import async_probe, client_reader
+from .helpers.register_map import async_list_models, async_load_register_map
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -49,9 +70,14 @@ class NibeIqcConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             user_input = {}
         else:
             # Validate the connection
+            await self.async_set_unique_id(
+                f"{user_input[CONF_HOST_NAME]}:{user_input[CONF_HOST_PORT]}"
+                f":{user_input[CONF_SLAVE]}"
+            )
+            self._abort_if_unique_id_configured()
             error = await self._validate_connection(user_input)
             if error is None:
-                self.user_input = user_input
+                self.user_input = {**user_input, **await self._async_probe(user_input)}
                 return self.async_create_entry(
                     title=user_input[CONF_DEVICE_NAME], data=self.user_input
                 )
@@ -65,6 +91,12 @@ class NibeIqcConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             vol.Required(CONF_DEVICE_NAME): cv.string,
             vol.Required(CONF_HOST_NAME): cv.string,
             vol.Required(CONF_HOST_PORT, default=502): cv.positive_int,
+            vol.Required(CONF_SLAVE, default=DEFAULT_SLAVE): vol.All(
+                vol.Coerce(int), vol.Range(min=1, max=247)
+            ),
+            vol.Required(CONF_MODEL, default=DEFAULT_MODEL): vol.In(
+                await async_list_models(self.hass)
+            ),
         }
 
         return self.async_show_form(
@@ -92,6 +124,29 @@ class NibeIqcConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
         return None
 
+    async def _async_probe(self, user_input: dict) -> dict[str, list]:
+        """Probe the registers of the model, return the outcome as entry data."""
+        register_map = await async_load_register_map(self.hass, user_input[CONF_MODEL])
+        spans = register_map.spans()
+        client = AsyncModbusTcpClient(
+            user_input[CONF_HOST_NAME], port=user_input[CONF_HOST_PORT]
+        )
+        try:
+            await client.connect()
+            supported = await async_probe(
+                client_reader(client, user_input[CONF_SLAVE]), spans, DEFAULT_READ_GAP
+            )
+        except (ModbusException, asyncio.TimeoutError, OSError) as err:
+            # Setup probes again
+            _LOGGER.warning("Failed to probe the registers of the unit: %s", err)
+            return {}
+        finally:
+            client.close()
+        return {
+            CONF_SUPPORTED: sorted(supported),
+            CONF_UNSUPPORTED: sorted(spans - supported),
+        }
+
 
 class OptionsFlowHandler(config_entries.OptionsFlow):
     """Options flow handler for NIBE."""
@@ -109,14 +164,24 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
             # Validate the connection
             error = await self._validate_connection(user_input)
             if error is None:
+                if user_input.pop(CONF_REPROBE, False):
+                    # Forget the probe outcome, the reload probes all registers
+                    self.hass.config_entries.async_update_entry(
+                        self.config_entry,
+                        data={
+                            key: value
+                            for key, value in self.config_entry.data.items()
+                            if key not in (CONF_SUPPORTED, CONF_UNSUPPORTED)
+                        },
+                    )
                 return self.async_create_entry(
                     title=self.config_entry.title, data=user_input
                 )
             self._errors[error[0]] = error[1]
 
-        return self._show_options_form(user_input)
+        return await self._show_options_form(user_input)
 
-    def _show_options_form(self, user_input) -> FlowResult:
+    async def _show_options_form(self, user_input) -> FlowResult:
         """Show the options form."""
         user_schema = {
             vol.Required(
@@ -125,6 +190,47 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
             vol.Required(
                 CONF_HOST_PORT, default=self.config_entry.data.get(CONF_HOST_PORT, 502)
             ): cv.positive_int,
+            vol.Required(
+                CONF_SLAVE,
+                default=self.config_entry.options.get(
+                    CONF_SLAVE, self.config_entry.data.get(CONF_SLAVE, DEFAULT_SLAVE)
+                ),
+            ): vol.All(vol.Coerce(int), vol.Range(min=1, max=247)),
+            vol.Required(
+                CONF_MODEL,
+                default=self.config_entry.options.get(
+                    CONF_MODEL, self.config_entry.data.get(CONF_MODEL, DEFAULT_MODEL)
+                ),
+            ): vol.In(await async_list_models(self.hass)),
+            vol.Required(
+                CONF_READ_GAP,
+                default=self.config_entry.options.get(CONF_READ_GAP, DEFAULT_READ_GAP),
+            ): vol.All(vol.Coerce(int), vol.Range(min=0, max=100)),
+            vol.Required(
+                CONF_MAX_IN_FLIGHT,
+                default=self.config_entry.options.get(
+                    CONF_MAX_IN_FLIGHT, DEFAULT_MAX_IN_FLIGHT
+                ),
+            ): vol.All(vol.Coerce(int), vol.Range(min=1, max=16)),
+            vol.Required(
+                CONF_WRITE_DELAY,
+                default=self.config_entry.options.get(
+                    CONF_WRITE_DELAY, DEFAULT_WRITE_DELAY
+                ),
+            ): vol.All(vol.Coerce(float), vol.Range(min=0, max=10)),
+            vol.Required(
+                CONF_WRITE_MAX_DELAY,
+                default=self.config_entry.options.get(
+                    CONF_WRITE_MAX_DELAY, DEFAULT_WRITE_MAX_DELAY
+                ),
+            ): vol.All(vol.Coerce(float), vol.Range(min=0, max=60)),
+            vol.Required(
+                CONF_RECORD_TRAFFIC,
+                default=self.config_entry.options.get(
+                    CONF_RECORD_TRAFFIC, DEFAULT_RECORD_TRAFFIC
+                ),
+            ): cv.boolean,
+            vol.Required(CONF_REPROBE, default=False): cv.boolean,
         }
 
         return self.async_show_form(
@@ -1,5 +1,7 @@
 """Constants for the Nibe integration."""
 
+from datetime import timedelta
+
 from homeassistant.const import Platform
 
 # Integration metadata
@@ -23,6 +25,60 @@ HOLDING_REGISTERS = "holding_registers"
 COIL = "coil"
 DISCRETE_INPUTS = "discrete_inputs"
 
+# Client methods reading each register type
+READ_FUNCTIONS = {
+    COIL: "read_coils",
+    DISCRETE_INPUTS: "read_discrete_inputs",
+    INPUT_REGISTERS: "read_input_registers",
+    HOLDING_REGISTERS: "read_holding_registers",
+}
+
+# Register data types
+DATA_TYPE_INT16 = "int16"
+DATA_TYPE_UINT16 = "uint16"
+DATA_TYPE_INT32 = "int32"
+DATA_TYPE_UINT32 = "uint32"
+DATA_TYPE_INT64 = "int64"
+DATA_TYPE_UINT64 = "uint64"
+
+# Order of the words of multi-register values
+WORD_ORDER_BIG = "big"
+WORD_ORDER_LITTLE = "little"
+
+# Polling tiers, fastest first
+POLL_TIER_FAST = "fast"
+POLL_TIER_NORMAL = "normal"
+POLL_TIER_SLOW = "slow"
+POLL_TIERS = [POLL_TIER_FAST, POLL_TIER_NORMAL, POLL_TIER_SLOW]
+POLL_TIER_INTERVALS = {
+    POLL_TIER_FAST: timedelta(seconds=5),
+    POLL_TIER_NORMAL: timedelta(seconds=15),
+    POLL_TIER_SLOW: timedelta(minutes=5),
+}
+
+# Request priorities, lower values are sent first
+PRIORITY_WRITE = 0
+PRIORITY_READBACK = 1
+PRIORITY_POLL_FAST = 2
+PRIORITY_POLL_NORMAL = 3
+PRIORITY_POLL_SLOW = 4
+PRIORITY_SCAN = 5
+PRIORITY_KEEPALIVE = 6
+POLL_PRIORITIES = {
+    POLL_TIER_FAST: PRIORITY_POLL_FAST,
+    POLL_TIER_NORMAL: PRIORITY_POLL_NORMAL,
+    POLL_TIER_SLOW: PRIORITY_POLL_SLOW,
+}
+REQUEST_PRIORITIES = {
+    PRIORITY_WRITE: "write",
+    PRIORITY_READBACK: "read_back",
+    PRIORITY_POLL_FAST: "poll_fast",
+    PRIORITY_POLL_NORMAL: "poll_normal",
+    PRIORITY_POLL_SLOW: "poll_slow",
+    PRIORITY_SCAN: "scan",
+    PRIORITY_KEEPALIVE: "keepalive",
+}
+
 # Button classes
 BUTTON_CLASS_START = "button_class_start"
 BUTTON_CLASS_SET_TIME = "button_class_set_time"
@@ -43,6 +99,42 @@ ICON_START = "mdi:ray-start-arrow"
 CONF_HOST_NAME = "host_name"
 CONF_HOST_PORT = "host_port"
 CONF_DEVICE_NAME = "device_name"
+CONF_SLAVE = "slave"
+CONF_READ_GAP = "read_gap"
+CONF_MAX_IN_FLIGHT = "max_in_flight"
+CONF_WRITE_DELAY = "write_delay"
+CONF_WRITE_MAX_DELAY = "write_max_delay"
+CONF_MODEL = "model"
+CONF_SUPPORTED = "supported"
+CONF_UNSUPPORTED = "unsupported"
+CONF_RECORD_TRAFFIC = "record_traffic"
+CONF_REPROBE = "reprobe"
+
+# Modbus protocol limits for a single read request
+MAX_READ_REGISTERS = 125
+MAX_READ_BITS = 2000
+
+# Modbus protocol limits for a single write request
+MAX_WRITE_REGISTERS = 123
+MAX_WRITE_BITS = 1968
+
+# Writes issued within this many seconds are sent together
+WRITE_COALESCE_WINDOW = 0.1
+
+# hass.data key of the connections shared between config entries
+DATA_CONNECTIONS = f"{DOMAIN}_connections"
+
+# hass.data key of the poll phases of all coordinators
+DATA_PHASES = f"{DOMAIN}_phases"
+
+# hass.data key of the lock around the compiled register map cache
+DATA_REGISTER_MAPS = f"{DOMAIN}_register_maps"
 
 # Default values
 DEFAULT_SLAVE = 1
+DEFAULT_READ_GAP = 10
+DEFAULT_MAX_IN_FLIGHT = 1
+DEFAULT_WRITE_DELAY = 1.0
+DEFAULT_WRITE_MAX_DELAY = 5.0
+DEFAULT_MODEL = "common"
+DEFAULT_RECORD_TRAFFIC = False
@@ -0,0 +1,48 @@
+"""Diagnostics support for Nibe"""
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_HOST_NAME, CONF_HOST_PORT, DOMAIN, REQUEST_PRIORITIES
+
+# The options flow stores the host and port again, so they are redacted in both
+TO_REDACT = {CONF_HOST_NAME, CONF_HOST_PORT}
+
+
+def _block_name(block) -> str:
+    return f"{block.register_type} {block.address}-{block.end - 1}"
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    return {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": async_redact_data(dict(entry.options), TO_REDACT),
+        },
+        "last_update_success": coordinator.last_update_success,
+        "connection": {
+            "connected": coordinator.client.connected,
+            "failures": coordinator.connection.failures(coordinator.slave),
+            "breaker_open": coordinator.connection.breaker_open(coordinator.slave),
+            "retry_in": round(coordinator.connection.retry_in(coordinator.slave), 1),
+        },
+        "queue_delays": {
+            REQUEST_PRIORITIES[priority]: metrics
+            for priority, metrics in coordinator.scheduler.metrics().items()
+        },
+        "planned_blocks": [_block_name(block) for block in coordinator.planner.plan()],
+        "blocks": {
+            _block_name(block): stats
+            for block, stats in coordinator.block_stats.items()
+        },
+        "failed_blocks": [
+            _block_name(block) for block in sorted(coordinator.failed_blocks)
+        ],
+    }
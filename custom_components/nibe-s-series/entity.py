@@ -1,9 +1,19 @@
 """Nibe Entity class"""
 import logging
 from custom_components.nibe.helpers.general import get_parameter
+from homeassistant.core import callback
 from homeassistant.helpers.entity import Entity
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from .const import CONF_HOST_NAME, DOMAIN, NAME, VERSION
+from .const import (
+    CONF_HOST_NAME,
+    CONF_SLAVE,
+    DEFAULT_SLAVE,
+    DOMAIN,
+    NAME,
+    POLL_TIER_NORMAL,
+    VERSION,
+)
+from .helpers.decoder import Decoding
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -12,6 +22,7 @@ class NibeEntity(CoordinatorEntity, Entity):
     """Entity class."""
 
     _attr_has_entity_name = True
+    _default_poll_tier = POLL_TIER_NORMAL
 
     def __init__(self, coordinator: CoordinatorEntity, idx, config_entry):
         super().__init__(coordinator)
@@ -19,11 +30,22 @@ class NibeEntity(CoordinatorEntity, Entity):
         self.idx = idx
 
         self._attr_name = self.idx["name"]
-        self._attr_icon = self.idx["icon"]
+        self._attr_icon = self.idx.get("icon")
 
         ip = get_parameter(config_entry, CONF_HOST_NAME).replace(".", "")
-        modbus_address = str(self.idx["modbus_address"])
-        self._attr_unique_id = f"{ip}_{modbus_address}"
+        modbus_address = str(
+            self.idx.get("address", self.idx.get("target_temp_address"))
+        )
+        slave = int(get_parameter(config_entry, CONF_SLAVE, DEFAULT_SLAVE))
+        if slave == DEFAULT_SLAVE:
+            self._attr_unique_id = f"{ip}_{modbus_address}"
+        else:
+            # Units behind one gateway share the IP address
+            self._attr_unique_id = f"{ip}_{slave}_{modbus_address}"
+
+        self._decoding = None
+        if "address" in self.idx:
+            self._decoding = Decoding.from_descriptor(self.idx)
 
     @property
     def device_info(self):
@@ -33,3 +55,79 @@ class NibeEntity(CoordinatorEntity, Entity):
             "model": VERSION,
             "manufacturer": NAME,
         }
+
+    def decodings(self) -> list[Decoding]:
+        """Return how the registers of the entity are decoded."""
+        if self._decoding is None:
+            return []
+        return [self._decoding]
+
+    def register_spans(self):
+        """Return the (register_type, address, count) spans the entity reads."""
+        return [
+            (decoding.register_type, decoding.address, decoding.count)
+            for decoding in self.decodings()
+        ]
+
+    def _decoded_value(self, decoding: Decoding = None, default=None):
+        """Return the decoded value of the registers of the entity."""
+        return self.coordinator.decoder.get(decoding or self._decoding, default)
+
+    @property
+    def available(self) -> bool:
+        """Return False if the last poll failed or a block of the entity did."""
+        return super().available and self.coordinator.spans_available(
+            self.register_spans()
+        )
+
+    @property
+    def stale(self) -> bool:
+        """Return True while a value is restored from the last run."""
+        return self.coordinator.spans_stale(self.register_spans())
+
+    @property
+    def extra_state_attributes(self):
+        """Flag restored values until they are read again."""
+        if self.stale:
+            return {"stale": True}
+        return None
+
+    @property
+    def poll_tier(self) -> str:
+        """Return how often the registers of the entity are polled."""
+        return self.idx.get("poll_tier", self._default_poll_tier)
+
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to the addresses of the entity."""
+        await super().async_added_to_hass()
+        self._last_available = self.available
+        self._last_stale = self.stale
+        self.async_on_remove(
+            self.coordinator.async_add_register_spans(
+                self,
+                self.register_spans(),
+                self.poll_tier,
+                self._handle_registers_update,
+                self.decodings(),
+            )
+        )
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only when the availability or staleness changed.
+
+        Values are pushed to _handle_registers_update, which is only called
+        when one of the addresses of the entity changed.
+        """
+        if (
+            self.available != self._last_available
+            or self.stale != self._last_stale
+        ):
+            self._last_available = self.available
+            self._last_stale = self.stale
+            self.async_write_ha_state()
+
+    @callback
+    def _handle_registers_update(self) -> None:
+        """Handle changed values in the registers of the entity."""
+        self.async_write_ha_state()
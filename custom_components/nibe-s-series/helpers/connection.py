@@ -0,0 +1,275 @@
+"""Supervision of the Modbus TCP connection"""
+
+import asyncio
+import logging
+import random
+
+import async_timeout
+from pymodbus.client import AsyncModbusTcpClient
+from pymodbus.exceptions import ModbusException
+
+from homeassistant.core import HomeAssistant, callback
+
+# pylint: disable=relative-beyond-top-level
+from ..const import DEFAULT_MAX_IN_FLIGHT, DEFAULT_SLAVE, PRIORITY_KEEPALIVE
+from .pipeline import (
+    PIPELINE_PYMODBUS_VERSION,
+    PipelinedModbusTcpClient,
+    is_pipelined,
+    pipelining_supported,
+)
+from .scheduler import RequestScheduler
+
+_LOGGER = logging.getLogger(__name__)
+
+CONNECT_TIMEOUT = 5
+
+# Reconnect attempts back off exponentially between these delays, with
+# jitter so that several integrations do not retry in lockstep.
+RECONNECT_DELAY = 5
+RECONNECT_DELAY_MAX = 300
+
+# Consecutive failed polls after which polling is skipped until the backoff
+# delay has passed.
+BREAKER_THRESHOLD = 3
+
+# A connection that has not answered any request for this long is probed
+# with a single register read of a unit using it before it is used for a
+# poll. The read queues behind all other requests.
+KEEPALIVE_IDLE = 60
+KEEPALIVE_TIMEOUT = 3
+KEEPALIVE_ADDRESS = 1
+
+
+class ConnectionSupervisor:
+    """Connect, probe and back off a Modbus client without blocking polls.
+
+    Failures, backoff and the breaker are kept by unit, so a unit that does
+    not answer is paused while the other units on the gateway are polled.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        client: AsyncModbusTcpClient,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+    ):
+        self._hass = hass
+        self.client = client
+        # Unit IDs of the entries using the connection
+        self.slaves = []
+        self.scheduler = RequestScheduler(hass, max_in_flight)
+        # Consecutive failures and the time of the next attempt, by unit
+        self._failures = {}
+        self._retry_at = {}
+        # Time of the last response of any unit, or of the connect
+        self._last_response = None
+
+    def failures(self, slave: int) -> int:
+        """Return the consecutive failures of a unit."""
+        return self._failures.get(slave, 0)
+
+    def retry_in(self, slave: int) -> float:
+        """Return the seconds until the next attempt for a unit is allowed."""
+        return max(0.0, self._retry_at.get(slave, 0.0) - self._hass.loop.time())
+
+    def breaker_open(self, slave: int) -> bool:
+        """Return True while polls of a unit are skipped after failures."""
+        return self.failures(slave) >= BREAKER_THRESHOLD and self.retry_in(slave) > 0
+
+    async def async_ensure_connected(self, slave: int) -> bool:
+        """Return True if the client is connected and the unit may be polled."""
+        if self.breaker_open(slave):
+            return False
+        if self.client.connected:
+            if await self._async_keepalive():
+                return True
+            self.client.close()
+        elif self.retry_in(slave) > 0:
+            return False
+
+        _LOGGER.debug("Connecting to %s", self.client.comm_params.host)
+        try:
+            async with async_timeout.timeout(CONNECT_TIMEOUT):
+                connected = await self.client.connect()
+        except (asyncio.TimeoutError, ModbusException, OSError) as err:
+            _LOGGER.debug("Connecting failed: %s", err)
+            connected = False
+        if not connected:
+            self.record_failure(slave)
+            return False
+        self._last_response = self._hass.loop.time()
+        return True
+
+    async def _async_keepalive(self) -> bool:
+        """Probe a silent connection to detect a half-open TCP session."""
+        now = self._hass.loop.time()
+        if self._last_response is None or now - self._last_response < KEEPALIVE_IDLE:
+            return True
+        if not self.slaves:
+            return True
+        try:
+            await self.scheduler.async_submit(
+                PRIORITY_KEEPALIVE, self._async_keepalive_read, self.slaves[0]
+            )
+        except (asyncio.TimeoutError, ModbusException, OSError) as err:
+            _LOGGER.debug("Keepalive failed, reconnecting: %s", err)
+            return False
+        self.record_response()
+        return True
+
+    async def _async_keepalive_read(self, slave: int) -> None:
+        """Read a single register of a unit."""
+        async with async_timeout.timeout(KEEPALIVE_TIMEOUT):
+            await self.client.read_input_registers(
+                KEEPALIVE_ADDRESS, count=1, slave=slave
+            )
+
+    @callback
+    def record_success(self, slave: int) -> None:
+        """Close the breaker of a unit after a poll that read data."""
+        if self.failures(slave):
+            _LOGGER.info(
+                "Unit %s at %s answers again after %d failures",
+                slave,
+                self.client.comm_params.host,
+                self.failures(slave),
+            )
+        self._failures.pop(slave, None)
+        self._retry_at.pop(slave, None)
+
+    @callback
+    def record_response(self) -> None:
+        """Note that a unit answered a request, with data or an exception."""
+        self._last_response = self._hass.loop.time()
+
+    @callback
+    def record_failure(self, slave: int) -> None:
+        """Back off a unit after a failed connect or a poll that read nothing."""
+        failures = self._failures[slave] = self.failures(slave) + 1
+        delay = min(RECONNECT_DELAY * 2 ** (failures - 1), RECONNECT_DELAY_MAX)
+        delay = random.uniform(delay / 2, delay)
+        self._retry_at[slave] = self._hass.loop.time() + delay
+        if failures == 1:
+            _LOGGER.warning(
+                "Unit %s at %s failed, retrying in %.0f s",
+                slave,
+                self.client.comm_params.host,
+                delay,
+            )
+        elif failures == BREAKER_THRESHOLD:
+            _LOGGER.warning(
+                "Unit %s at %s failed %d times, pausing polls",
+                slave,
+                self.client.comm_params.host,
+                failures,
+            )
+        else:
+            _LOGGER.debug("Retrying unit %s in %.0f s", slave, delay)
+        # A connection that none of its units answers on may be half open
+        if self.client.connected and all(
+            self.failures(unit) >= BREAKER_THRESHOLD for unit in self.slaves or [slave]
+        ):
+            self.client.close()
+
+    @callback
+    def reset(self, slave: int) -> None:
+        """Allow an immediate attempt for a unit."""
+        self._failures.pop(slave, None)
+        self._retry_at.pop(slave, None)
+
+
+def _tcp_client(host: str, port: int) -> AsyncModbusTcpClient:
+    """Create the client of a gateway."""
+    # Reconnects are driven by the supervisor, not by pymodbus
+    if pipelining_supported():
+        return PipelinedModbusTcpClient(host, port=port, reconnect_delay=0)
+    return AsyncModbusTcpClient(host, port=port, reconnect_delay=0)
+
+
+class ConnectionPool:
+    """Share one supervised connection per gateway between config entries.
+
+    Units behind the same Modbus TCP gateway use one socket and one request
+    scheduler, so their requests are ordered instead of competing.
+    """
+
+    def __init__(self, hass: HomeAssistant, client_factory=None):
+        self._hass = hass
+        # Creates the client of a gateway from its host and port, such as a
+        # replay client to run from a traffic log
+        self._client_factory = client_factory or _tcp_client
+        self._connections = {}
+        self._users = {}
+
+    @callback
+    def acquire(
+        self,
+        host: str,
+        port: int,
+        slave: int = DEFAULT_SLAVE,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+    ) -> ConnectionSupervisor:
+        """Return the connection to host:port, opening it on first use.
+
+        The requests in flight on a gateway are capped at the lowest
+        max_in_flight of the entries using it, across all of them, or at one
+        when the client cannot pipeline.
+        """
+        key = (host, port)
+        connection = self._connections.get(key)
+        if connection is None:
+            client = self._client_factory(host, port)
+            connection = ConnectionSupervisor(self._hass, client, max_in_flight)
+            self._connections[key] = connection
+        if max_in_flight > 1 and not is_pipelined(connection.client):
+            _LOGGER.warning(
+                "Pipelined reads need pymodbus %s, reads to %s:%s are sent "
+                "one at a time",
+                PIPELINE_PYMODBUS_VERSION,
+                host,
+                port,
+            )
+        self._users.setdefault(key, []).append(max_in_flight)
+        connection.slaves.append(slave)
+        self._set_limit(connection, self._users[key])
+        return connection
+
+    @staticmethod
+    def _set_limit(connection: ConnectionSupervisor, users: list[int]) -> None:
+        """Cap the requests in flight for the max_in_flight of the users."""
+        if is_pipelined(connection.client):
+            connection.scheduler.set_limit(min(users))
+        else:
+            connection.scheduler.set_limit(1)
+
+    @callback
+    def release(
+        self,
+        connection: ConnectionSupervisor,
+        slave: int = DEFAULT_SLAVE,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+    ) -> None:
+        """Stop using a connection, closing it when no entry uses it."""
+        for key, shared in self._connections.items():
+            if shared is connection:
+                break
+        else:
+            return
+        self._users[key].remove(max_in_flight)
+        connection.slaves.remove(slave)
+        if slave not in connection.slaves:
+            connection.reset(slave)
+        if self._users[key]:
+            self._set_limit(connection, self._users[key])
+            return
+        del self._users[key]
+        del self._connections[key]
+        connection.scheduler.async_cancel()
+        if connection.client.connected:
+            _LOGGER.info("Closing Modbus connection to %s:%s", *key)
+            connection.client.close()
+
+    def connections(self) -> list[ConnectionSupervisor]:
+        """Return the open connections."""
+        return list(self._connections.values())
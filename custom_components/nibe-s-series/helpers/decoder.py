@@ -0,0 +1,219 @@
+"""Precompiled decoding of register values for the entities"""
+
+import logging
+import math
+import struct
+from typing import NamedTuple
+
+# pylint: disable=relative-beyond-top-level
+from ..const import (
+    COIL,
+    DATA_TYPE_INT16,
+    DATA_TYPE_INT32,
+    DATA_TYPE_INT64,
+    DATA_TYPE_UINT16,
+    DATA_TYPE_UINT32,
+    DATA_TYPE_UINT64,
+    DISCRETE_INPUTS,
+    WORD_ORDER_BIG,
+    WORD_ORDER_LITTLE,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+STRUCT_FORMATS = {
+    DATA_TYPE_INT16: "h",
+    DATA_TYPE_UINT16: "H",
+    DATA_TYPE_INT32: "i",
+    DATA_TYPE_UINT32: "I",
+    DATA_TYPE_INT64: "q",
+    DATA_TYPE_UINT64: "Q",
+}
+
+# Multi-register values in little word order are unpacked from the block
+# packed as little endian words, which puts the low word first.
+BYTE_ORDERS = {WORD_ORDER_BIG: ">", WORD_ORDER_LITTLE: "<"}
+
+
+class Decoding(NamedTuple):
+    """How the registers at an address turn into an entity value."""
+
+    register_type: str
+    address: int
+    data_type: str = DATA_TYPE_INT16
+    scale: float = 1
+    precision: int = None
+    word_order: str = WORD_ORDER_BIG
+
+    @classmethod
+    def from_descriptor(cls, idx, **overrides) -> "Decoding":
+        """Build the decoding of an entity descriptor."""
+        values = {
+            "register_type": idx["register_type"],
+            "address": idx["address"],
+            "data_type": idx.get("data_type", DATA_TYPE_INT16),
+            "scale": idx.get("scale", 1),
+            "precision": idx.get("precision"),
+            "word_order": idx.get("word_order", WORD_ORDER_BIG),
+        }
+        values.update(overrides)
+        return cls(**values)
+
+    @property
+    def count(self) -> int:
+        """Return the number of addresses the value occupies."""
+        if self.register_type in (COIL, DISCRETE_INPUTS):
+            return 1
+        return struct.calcsize(STRUCT_FORMATS[self.data_type]) // 2
+
+    def encode(self, value) -> list[int]:
+        """Return the register words holding the unscaled value."""
+        raw = round(value / self.scale)
+        order = BYTE_ORDERS[self.word_order]
+        data = struct.pack(order + STRUCT_FORMATS[self.data_type], raw)
+        return list(struct.unpack(f"{order}{self.count}H", data))
+
+
+def _default_precision(scale: float):
+    """Return the decimals a scale factor produces, None to keep integers."""
+    if scale == 1:
+        return None
+    return max(0, -math.floor(math.log10(abs(scale)) + 1e-9))
+
+
+class _Field:
+    """A raw value shared by the decodings of the same registers."""
+
+    __slots__ = ("address", "count", "byte_order", "unpack_from", "outputs")
+
+    def __init__(self, decoding: Decoding):
+        self.address = decoding.address
+        self.count = decoding.count
+        self.byte_order = BYTE_ORDERS[decoding.word_order]
+        self.unpack_from = None
+        if decoding.register_type not in (COIL, DISCRETE_INPUTS):
+            self.unpack_from = struct.Struct(
+                self.byte_order + STRUCT_FORMATS[decoding.data_type]
+            ).unpack_from
+        self.outputs = []
+
+    def add(self, decoding: Decoding) -> None:
+        precision = decoding.precision
+        if precision is None:
+            precision = _default_precision(decoding.scale)
+        self.outputs.append((decoding, decoding.scale, precision))
+
+
+class DecodeTable:
+    """Decode the register values of all entities in batched passes.
+
+    The table is compiled from the decodings of the subscribed entities. A
+    read block is packed into a byte buffer once and every field whose
+    registers changed is unpacked from it with a precompiled struct.
+    """
+
+    def __init__(self, registers):
+        self._registers = registers
+        self._refs = {}
+        self._index = {}
+        self.values = {}
+
+    def add(self, decodings) -> None:
+        """Subscribe decodings and decode them from the stored registers."""
+        added = []
+        for decoding in decodings:
+            if decoding not in self._refs:
+                added.append(decoding)
+            self._refs[decoding] = self._refs.get(decoding, 0) + 1
+        if not added:
+            return
+        self._compile()
+        for decoding in added:
+            value = self._decode_stored(decoding)
+            if value is not None:
+                self.values[decoding] = value
+
+    def remove(self, decodings) -> None:
+        """Unsubscribe decodings added before."""
+        removed = False
+        for decoding in decodings:
+            self._refs[decoding] -= 1
+            if not self._refs[decoding]:
+                del self._refs[decoding]
+                self.values.pop(decoding, None)
+                removed = True
+        if removed:
+            self._compile()
+
+    def _compile(self) -> None:
+        fields = {}
+        for decoding in self._refs:
+            key = (
+                decoding.register_type,
+                decoding.address,
+                decoding.data_type,
+                decoding.word_order,
+            )
+            field = fields.get(key)
+            if field is None:
+                field = fields[key] = _Field(decoding)
+            field.add(decoding)
+
+        index = {}
+        for (register_type, address, _, _), field in fields.items():
+            for offset in range(field.count):
+                index.setdefault((register_type, address + offset), []).append(field)
+        self._index = index
+        _LOGGER.debug("Compiled %d decode fields", len(fields))
+
+    def decode(self, register_type: str, address: int, values, changed) -> None:
+        """Decode the fields of a read block whose registers changed."""
+        fields = {}
+        for changed_address in changed:
+            for field in self._index.get((register_type, changed_address), ()):
+                fields[field] = None
+        if fields:
+            self._decode_fields(fields, address, values, self.values)
+
+    @staticmethod
+    def _decode_fields(fields, address: int, values, results: dict) -> None:
+        end = address + len(values)
+        buffers = {}
+        for field in fields:
+            # Never combine words of one value from different reads
+            if field.address < address or field.address + field.count > end:
+                continue
+            offset = field.address - address
+            if field.unpack_from is None:
+                raw = bool(values[offset])
+            else:
+                buffer = buffers.get(field.byte_order)
+                if buffer is None:
+                    buffer = buffers[field.byte_order] = struct.pack(
+                        f"{field.byte_order}{len(values)}H", *values
+                    )
+                raw = field.unpack_from(buffer, 2 * offset)[0]
+            for decoding, scale, precision in field.outputs:
+                value = raw * scale if scale != 1 else raw
+                if precision is not None:
+                    value = round(value, precision)
+                results[decoding] = value
+
+    def _decode_stored(self, decoding: Decoding):
+        words = self._registers(decoding.register_type).get_many(
+            decoding.address, decoding.count
+        )
+        if words is None:
+            return None
+        field = _Field(decoding)
+        field.add(decoding)
+        results = {}
+        self._decode_fields([field], decoding.address, words, results)
+        return results.get(decoding)
+
+    def get(self, decoding: Decoding, default=None):
+        """Return the decoded value, or default if it was never read."""
+        if decoding in self.values:
+            return self.values[decoding]
+        value = self._decode_stored(decoding)
+        return default if value is None else value
@@ -0,0 +1,32 @@
+"""Staggered poll phases"""
+
+from homeassistant.core import callback
+
+
+class PollPhases:
+    """Spread the poll ticks of all coordinators evenly over the interval.
+
+    Coordinators started together would otherwise poll on the same
+    boundaries, which turns into bursts on shared gateways.
+    """
+
+    def __init__(self):
+        self._members = []
+
+    @callback
+    def add(self, member) -> None:
+        """Add a coordinator and spread the phases again."""
+        self._members.append(member)
+        self._spread()
+
+    @callback
+    def remove(self, member) -> None:
+        """Remove a coordinator and spread the phases again."""
+        if member in self._members:
+            self._members.remove(member)
+            self._spread()
+
+    def _spread(self) -> None:
+        count = len(self._members)
+        for index, member in enumerate(self._members):
+            member.set_phase(index / count)
@@ -0,0 +1,107 @@
+"""Pipelined Modbus requests"""
+
+import asyncio
+import logging
+
+import pymodbus
+from pymodbus.client import AsyncModbusTcpClient
+from pymodbus.client.modbusclientprotocol import ModbusClientProtocol
+from pymodbus.framer import FramerType
+from pymodbus.pdu import ModbusPDU
+from pymodbus.pdu.bit_read_message import ReadCoilsRequest, ReadDiscreteInputsRequest
+from pymodbus.pdu.register_read_message import (
+    ReadHoldingRegistersRequest,
+    ReadInputRegistersRequest,
+)
+
+# pylint: disable=relative-beyond-top-level
+from ..const import COIL, DISCRETE_INPUTS, HOLDING_REGISTERS, INPUT_REGISTERS
+from .read_planner import ReadBlock
+
+_LOGGER = logging.getLogger(__name__)
+
+# The pipelined client builds on the transaction and framing internals of
+# this pymodbus release, the version pinned in manifest.json. With any other
+# version the reads are sent one at a time.
+PIPELINE_PYMODBUS_VERSION = "3.7.4"
+
+READ_REQUESTS = {
+    COIL: ReadCoilsRequest,
+    DISCRETE_INPUTS: ReadDiscreteInputsRequest,
+    INPUT_REGISTERS: ReadInputRegistersRequest,
+    HOLDING_REGISTERS: ReadHoldingRegistersRequest,
+}
+
+
+def pipelining_supported() -> bool:
+    """Return True if the installed pymodbus can pipeline requests."""
+    return pymodbus.__version__ == PIPELINE_PYMODBUS_VERSION
+
+
+def is_pipelined(client) -> bool:
+    """Return True if client can have several reads in flight."""
+    return getattr(client, "pipelined", False)
+
+
+class _PipelinedProtocol(ModbusClientProtocol):
+    """Client protocol that keeps up with several outstanding responses.
+
+    The stock protocol consumes one frame per received chunk and drops the
+    received bytes whenever a request is sent. Pipelined responses often
+    arrive in the same chunk and requests are sent while responses arrive.
+    """
+
+    def callback_data(self, data: bytes, addr: tuple | None = None) -> int:
+        """Handle every complete frame in the received data."""
+        used = 0
+        while used < len(data):
+            cut = super().callback_data(data[used:], addr)
+            if not cut:
+                break
+            used += cut
+        return used
+
+    def send(self, data: bytes, addr: tuple | None = None) -> None:
+        """Send a request, keeping a partly received response."""
+        received = self.recv_buffer
+        super().send(data, addr)
+        self.recv_buffer = received
+
+
+class PipelinedModbusTcpClient(AsyncModbusTcpClient):
+    """Modbus TCP client that can have several reads in flight.
+
+    The client's own execute path holds a lock until the response arrives,
+    which allows a single transaction at a time. Pipelined reads are sent
+    with their own transaction id and the response is matched by that id.
+    """
+
+    pipelined = True
+
+    def __init__(
+        self,
+        host: str,
+        framer: FramerType = FramerType.SOCKET,
+        on_connect_callback=None,
+        **kwargs,
+    ):
+        super().__init__(
+            host, framer=framer, on_connect_callback=on_connect_callback, **kwargs
+        )
+        self.ctx = _PipelinedProtocol(framer, self.comm_params, on_connect_callback)
+
+    async def async_pipelined_read(self, block: ReadBlock, slave: int) -> ModbusPDU:
+        """Read a block without waiting for earlier requests to be answered."""
+        request = READ_REQUESTS[block.register_type](
+            address=block.address, count=block.count, slave=slave
+        )
+        request.transaction_id = self.ctx.transaction.getNextTID()
+        packet = self.ctx.framer.buildFrame(request)
+        response = self.build_response(request)
+        self.ctx.send(packet)
+        try:
+            return await asyncio.wait_for(
+                response, timeout=self.comm_params.timeout_connect
+            )
+        finally:
+            self.ctx.transaction.delTransaction(request.transaction_id)
@@ -0,0 +1,97 @@
+"""Probing which registers a unit implements"""
+
+import logging
+
+from pymodbus.client import AsyncModbusTcpClient
+from pymodbus.exceptions import ModbusException
+
+# pylint: disable=relative-beyond-top-level
+from ..const import COIL, DISCRETE_INPUTS, READ_FUNCTIONS
+from .read_planner import plan_reads
+
+_LOGGER = logging.getLogger(__name__)
+
+# Nibe units answer registers they do not implement with -32768
+SENTINEL = 0x8000
+
+# Exception codes meaning the unit does not implement a register: illegal
+# function and illegal data address. Other codes, such as the gateway
+# exceptions, and pymodbus' code 0 for a request without response say
+# nothing about the register.
+UNSUPPORTED_CODES = (1, 2)
+
+
+class ExceptionResponse(Exception):
+    """Raised by probe reads when the unit does not implement a register."""
+
+
+def client_reader(client: AsyncModbusTcpClient, slave: int):
+    """Return a probe read function sending requests with client."""
+
+    async def read(register_type: str, address: int, count: int):
+        method = getattr(client, READ_FUNCTIONS[register_type])
+        result = await method(address, count=count, slave=slave)
+        if result.isError():
+            if getattr(result, "exception_code", None) in UNSUPPORTED_CODES:
+                raise ExceptionResponse(f"{register_type} {address}: {result}")
+            raise ModbusException(f"{register_type} {address}: {result}")
+        if register_type in (COIL, DISCRETE_INPUTS):
+            return result.bits[:count]
+        return result.registers
+
+    return read
+
+
+def _is_sentinel(words) -> bool:
+    """Return True if words hold the lowest value of their signed type."""
+    if len(words) == 1:
+        return words[0] == SENTINEL
+    # Either word order, the most significant word is 0x8000 and all else 0
+    return sorted(words) == [0] * (len(words) - 1) + [SENTINEL]
+
+
+async def async_probe(read, spans, max_gap: int) -> set[tuple[str, int, int]]:
+    """Return the (register_type, address, count) spans the unit implements.
+
+    read(register_type, address, count) returns the values of a range and
+    raises ExceptionResponse when the unit does not implement a register.
+    Spans are read in merged blocks, a block answered with such an exception
+    is split in halves until the failing spans are found. Other errors, such
+    as a lost connection or another exception response, are raised.
+    """
+    by_type = {}
+    for register_type, address, count in spans:
+        by_type.setdefault(register_type, set()).add((address, count))
+    supported = set()
+    for register_type, type_spans in by_type.items():
+        for block in plan_reads(register_type, type_spans, max_gap):
+            inside = sorted(
+                (address, count)
+                for address, count in type_spans
+                if block.address <= address and address + count <= block.end
+            )
+            supported.update(await _async_probe_spans(read, register_type, inside))
+    _LOGGER.debug("%d of %d probed spans are supported", len(supported), len(spans))
+    return supported
+
+
+async def _async_probe_spans(read, register_type: str, spans) -> list:
+    start = spans[0][0]
+    end = max(address + count for address, count in spans)
+    try:
+        values = await read(register_type, start, end - start)
+    except ExceptionResponse as err:
+        if len(spans) == 1:
+            _LOGGER.debug("%s %s is not supported: %s", register_type, start, err)
+            return []
+        half = len(spans) // 2
+        return await _async_probe_spans(
+            read, register_type, spans[:half]
+        ) + await _async_probe_spans(read, register_type, spans[half:])
+
+    bits = register_type in (COIL, DISCRETE_INPUTS)
+    return [
+        (register_type, address, count)
+        for address, count in spans
+        if bits or not _is_sentinel(values[address - start : address - start + count])
+    ]
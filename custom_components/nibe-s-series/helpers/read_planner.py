@@ -0,0 +1,122 @@
+"""Read planner for Modbus block reads"""
+
+import logging
+from typing import NamedTuple
+
+# pylint: disable=relative-beyond-top-level
+from ..const import (
+    COIL,
+    DEFAULT_READ_GAP,
+    DISCRETE_INPUTS,
+    MAX_READ_BITS,
+    MAX_READ_REGISTERS,
+    POLL_TIER_NORMAL,
+    POLL_TIERS,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ReadBlock(NamedTuple):
+    """A contiguous range read with a single Modbus request."""
+
+    register_type: str
+    address: int
+    count: int
+
+    @property
+    def end(self) -> int:
+        """Return the first address after the block."""
+        return self.address + self.count
+
+
+def max_block_size(register_type: str) -> int:
+    """Return the protocol limit for a single read of the register type."""
+    if register_type in (COIL, DISCRETE_INPUTS):
+        return MAX_READ_BITS
+    return MAX_READ_REGISTERS
+
+
+def plan_reads(register_type: str, spans, max_gap: int) -> list[ReadBlock]:
+    """Merge (address, count) spans into the fewest contiguous reads.
+
+    Spans are never split, so multi-word values always come from one read.
+    Neighbouring spans are merged when the hole between them is at most
+    max_gap addresses and the merged read stays within the protocol limit.
+    """
+    limit = max_block_size(register_type)
+    blocks = []
+    start = end = None
+    for address, count in sorted(set(spans)):
+        span_end = address + count
+        if (
+            start is not None
+            and address - end <= max_gap
+            and max(end, span_end) - start <= limit
+        ):
+            end = max(end, span_end)
+            continue
+        if start is not None:
+            blocks.append(ReadBlock(register_type, start, end - start))
+        start, end = address, span_end
+    if start is not None:
+        blocks.append(ReadBlock(register_type, start, end - start))
+    return blocks
+
+
+class ReadPlanner:
+    """Collect the addresses used by entities and cache the read plans.
+
+    Every owner registers its spans with a polling tier. A span used in
+    several tiers is only read by the fastest of them.
+    """
+
+    def __init__(self, max_gap: int = DEFAULT_READ_GAP):
+        self.max_gap = max_gap
+        self._spans = {}
+        self._plans = None
+
+    def add(self, owner, spans, tier: str = POLL_TIER_NORMAL) -> bool:
+        """Register the (register_type, address, count) spans used by owner.
+
+        Returns True if the plans have to be rebuilt.
+        """
+        entry = (tier, frozenset(spans))
+        if self._spans.get(owner) == entry:
+            return False
+        self._spans[owner] = entry
+        self._plans = None
+        return True
+
+    def remove(self, owner) -> None:
+        """Forget the spans registered by owner."""
+        if self._spans.pop(owner, None) is not None:
+            self._plans = None
+
+    def _build_plans(self) -> dict[str, list[ReadBlock]]:
+        rank = {tier: index for index, tier in enumerate(POLL_TIERS)}
+        fastest = {}
+        for tier, spans in self._spans.values():
+            for span in spans:
+                current = fastest.get(span)
+                if current is None or rank[tier] < rank[current]:
+                    fastest[span] = tier
+        plans = {}
+        for tier in POLL_TIERS:
+            by_type = {}
+            for (register_type, address, count), span_tier in fastest.items():
+                if span_tier == tier:
+                    by_type.setdefault(register_type, set()).add((address, count))
+            plans[tier] = [
+                block
+                for register_type, spans in sorted(by_type.items())
+                for block in plan_reads(register_type, spans, self.max_gap)
+            ]
+        _LOGGER.debug("Rebuilt read plans: %s", plans)
+        return plans
+
+    def plan(self, tiers=POLL_TIERS) -> list[ReadBlock]:
+        """Return the cached reads for the tiers, rebuilding them if needed."""
+        if self._plans is None:
+            self._plans = self._build_plans()
+        return [block for tier in tiers for block in self._plans[tier]]
@@ -0,0 +1,283 @@
+"""Register maps of the Nibe models, loaded from data files"""
+
+import asyncio
+import hashlib
+import json
+import logging
+from pathlib import Path
+
+import voluptuous as vol
+
+from homeassistant.components.number import NumberDeviceClass
+from homeassistant.components.sensor import SensorDeviceClass, SensorStateClass
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.storage import Store
+
+# pylint: disable=relative-beyond-top-level
+from ..const import (
+    BUTTON_CLASS_SET_TIME,
+    BUTTON_CLASS_START,
+    COIL,
+    DATA_REGISTER_MAPS,
+    DISCRETE_INPUTS,
+    DOMAIN,
+    HOLDING_REGISTERS,
+    INPUT_REGISTERS,
+    POLL_TIERS,
+    WORD_ORDER_BIG,
+    WORD_ORDER_LITTLE,
+)
+from .decoder import STRUCT_FORMATS, Decoding
+
+_LOGGER = logging.getLogger(__name__)
+
+MAPS_DIR = Path(__file__).parent.parent / "register_maps"
+MAP_VERSION = 1
+
+# Compiled maps are cached keyed by a hash of their files. Bump when the
+# compiled form changes, which invalidates all cached maps.
+CACHE_VERSION = 1
+STORAGE_VERSION = 1
+
+ADDRESS = vol.All(int, vol.Range(min=0, max=0xFFFF))
+NUMBER = vol.Any(int, float)
+POSITIVE = vol.All(NUMBER, vol.Range(min=0))
+
+ENTITY_SCHEMA = {
+    vol.Required("name"): str,
+    vol.Optional("icon"): str,
+    vol.Optional("poll_tier"): vol.In(POLL_TIERS),
+}
+
+# Values spanning several registers set "data_type" (int32, uint32, int64 or
+# uint64) and "word_order" ("little" when the low word comes first, as on
+# Nibe units). All words of a value are always read in the same request.
+REGISTER_SCHEMA = {
+    **ENTITY_SCHEMA,
+    vol.Required("address"): ADDRESS,
+    vol.Required("register_type"): vol.In(
+        [INPUT_REGISTERS, HOLDING_REGISTERS, COIL, DISCRETE_INPUTS]
+    ),
+    vol.Optional("data_type"): vol.In(list(STRUCT_FORMATS)),
+    vol.Optional("word_order"): vol.In([WORD_ORDER_BIG, WORD_ORDER_LITTLE]),
+    vol.Optional("scale"): NUMBER,
+    vol.Optional("precision"): vol.All(int, vol.Range(min=0)),
+    # Writes are read back unless the register does not keep the value
+    vol.Optional("verify"): bool,
+}
+
+PLATFORM_SCHEMAS = {
+    # Optional publish filter keys of a sensor:
+    #   deadband           - smallest absolute change that is published
+    #   deadband_relative  - smallest change as a fraction of the published value
+    #   min_interval       - seconds that must pass between two published states
+    #   heartbeat          - seconds after which a held back value is published
+    # Sensors with "startup" set are read before the platforms are set up.
+    "sensor": vol.Schema(
+        {
+            **REGISTER_SCHEMA,
+            vol.Optional("unit_of_measurement", default=None): vol.Any(None, str),
+            vol.Optional("device_class", default=None): vol.Any(
+                None, vol.In([device_class.value for device_class in SensorDeviceClass])
+            ),
+            vol.Optional("state_class", default=None): vol.Any(
+                None, vol.In([state_class.value for state_class in SensorStateClass])
+            ),
+            vol.Optional("deadband"): POSITIVE,
+            vol.Optional("deadband_relative"): POSITIVE,
+            vol.Optional("min_interval"): POSITIVE,
+            vol.Optional("heartbeat"): POSITIVE,
+            vol.Optional("startup"): bool,
+        }
+    ),
+    "number": vol.Schema(
+        {
+            **REGISTER_SCHEMA,
+            vol.Optional("unit_of_measurement"): vol.Any(None, str),
+            vol.Optional("device_class"): vol.Any(
+                None, vol.In([device_class.value for device_class in NumberDeviceClass])
+            ),
+            vol.Optional("min_value"): NUMBER,
+            vol.Optional("max_value"): NUMBER,
+            vol.Optional("step"): NUMBER,
+        }
+    ),
+    "select": vol.Schema({**REGISTER_SCHEMA, vol.Required("options"): [str]}),
+    "switch": vol.Schema(REGISTER_SCHEMA),
+    "climate": vol.Schema(
+        {
+            **ENTITY_SCHEMA,
+            vol.Required("current_temp_address"): ADDRESS,
+            vol.Required("target_temp_address"): ADDRESS,
+            vol.Required("hvac_action_address"): ADDRESS,
+            vol.Required("hvac_mode_address"): ADDRESS,
+            vol.Optional("min_temp"): NUMBER,
+            vol.Optional("max_temp"): NUMBER,
+            vol.Optional("step"): NUMBER,
+        }
+    ),
+    "button": vol.Schema(
+        {
+            **REGISTER_SCHEMA,
+            vol.Required("entity_class"): vol.In(
+                [BUTTON_CLASS_START, BUTTON_CLASS_SET_TIME]
+            ),
+        }
+    ),
+}
+
+# A model file extends another map, removes entities of it by platform and
+# name, and adds entities. An added entity replaces one with the same name.
+FILE_SCHEMA = vol.Schema(
+    {
+        vol.Required("version"): MAP_VERSION,
+        vol.Required("model"): str,
+        vol.Optional("extends"): str,
+        vol.Optional("exclude", default={}): {vol.In(PLATFORM_SCHEMAS): [str]},
+        **{
+            vol.Optional(platform, default=[]): [schema]
+            for platform, schema in PLATFORM_SCHEMAS.items()
+        },
+    }
+)
+
+
+class RegisterMapError(HomeAssistantError):
+    """Raised when a register map file is missing or invalid."""
+
+
+class RegisterMap:
+    """Validated entity descriptors of one model, by platform."""
+
+    __slots__ = ("model", "_entities")
+
+    def __init__(self, model: str, entities: dict[str, list[dict]]):
+        self.model = model
+        self._entities = entities
+
+    def descriptors(self, platform: str) -> list[dict]:
+        """Return the entity descriptors of a platform."""
+        return self._entities.get(platform, [])
+
+    def spans(self) -> set[tuple[str, int, int]]:
+        """Return the (register_type, address, count) spans of all entities."""
+        return {
+            (decoding.register_type, decoding.address, decoding.count)
+            for platform, descriptors in self._entities.items()
+            for idx in descriptors
+            for decoding in descriptor_decodings(platform, idx)
+        }
+
+    def restricted(self, supported) -> "RegisterMap":
+        """Return the map without the entities reading unsupported spans."""
+        supported = {tuple(span) for span in supported}
+        return RegisterMap(
+            self.model,
+            {
+                platform: [
+                    idx
+                    for idx in descriptors
+                    if all(
+                        (decoding.register_type, decoding.address, decoding.count)
+                        in supported
+                        for decoding in descriptor_decodings(platform, idx)
+                    )
+                ]
+                for platform, descriptors in self._entities.items()
+            },
+        )
+
+
+def descriptor_decodings(platform: str, idx: dict) -> list[Decoding]:
+    """Return the registers read by the entity of a descriptor."""
+    if platform == "climate":
+        # Current temperature, target, action and mode
+        return [
+            Decoding(INPUT_REGISTERS, idx["current_temp_address"], scale=0.1),
+            Decoding(HOLDING_REGISTERS, idx["target_temp_address"]),
+            Decoding(INPUT_REGISTERS, idx["hvac_action_address"]),
+            Decoding(COIL, idx["hvac_mode_address"]),
+        ]
+    if platform == "button":
+        # Buttons only write
+        return []
+    return [Decoding.from_descriptor(idx)]
+
+
+def _read_chain(name: str) -> list[tuple[str, str]]:
+    """Read a map file and the files it extends, the model file first."""
+    chain = []
+    while name is not None:
+        if name in (seen for seen, _ in chain):
+            raise RegisterMapError(f"Register map {name} extends itself")
+        path = MAPS_DIR / f"{name}.json"
+        try:
+            text = path.read_text(encoding="utf-8")
+            extends = json.loads(text).get("extends")
+        except (OSError, ValueError) as err:
+            raise RegisterMapError(f"Cannot read register map {name}: {err}") from err
+        chain.append((name, text))
+        name = extends
+    return chain
+
+
+def _compile(chain: list[tuple[str, str]]) -> dict:
+    """Validate the files of a map and merge them, base file first."""
+    model = None
+    entities = {platform: [] for platform in PLATFORM_SCHEMAS}
+    for name, text in reversed(chain):
+        try:
+            data = FILE_SCHEMA(json.loads(text))
+        except vol.Invalid as err:
+            raise RegisterMapError(f"Invalid register map {name}: {err}") from err
+        for platform, names in data["exclude"].items():
+            excluded = set(names)
+            entities[platform] = [
+                idx for idx in entities[platform] if idx["name"] not in excluded
+            ]
+        for platform in PLATFORM_SCHEMAS:
+            added = {idx["name"] for idx in data[platform]}
+            entities[platform] = [
+                idx for idx in entities[platform] if idx["name"] not in added
+            ] + data[platform]
+        model = data["model"]
+    return {"model": model, "entities": entities}
+
+
+def _list_models() -> dict[str, str]:
+    models = {}
+    for path in sorted(MAPS_DIR.glob("*.json")):
+        try:
+            models[path.stem] = json.loads(path.read_text(encoding="utf-8"))["model"]
+        except (OSError, ValueError, KeyError):
+            _LOGGER.warning("Ignoring unreadable register map %s", path.name)
+    return models
+
+
+async def async_list_models(hass: HomeAssistant) -> dict[str, str]:
+    """Return the model names of the register maps, keyed by map name."""
+    return await hass.async_add_executor_job(_list_models)
+
+
+async def async_load_register_map(hass: HomeAssistant, name: str) -> RegisterMap:
+    """Load a register map, compiling it only when its files changed."""
+    chain = await hass.async_add_executor_job(_read_chain, name)
+    digest = hashlib.sha256(str(CACHE_VERSION).encode())
+    for file_name, text in chain:
+        digest.update(f"\0{file_name}\0{text}".encode())
+    digest = digest.hexdigest()
+
+    # Entries set up together would each compile a changed map and save
+    # the cache over each other, so the cache is updated by one at a time
+    lock = hass.data.setdefault(DATA_REGISTER_MAPS, asyncio.Lock())
+    async with lock:
+        store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.register_maps")
+        cache = await store.async_load() or {}
+        compiled = cache.get(name)
+        if compiled is None or compiled.get("hash") != digest:
+            _LOGGER.debug("Compiling register map %s", name)
+            compiled = {"hash": digest, **_compile(chain)}
+            cache[name] = compiled
+            await store.async_save(cache)
+    return RegisterMap(compiled["model"], compiled["entities"])
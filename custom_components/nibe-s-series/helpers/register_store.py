@@ -0,0 +1,155 @@
+"""Address indexed storage of Modbus register values"""
+
+from array import array
+import time
+
+# Addresses are grouped in fixed size pages, so a lookup is a single dict
+# access plus an offset and only the populated parts of the 64k address
+# space take memory.
+PAGE_SHIFT = 6
+PAGE_SIZE = 1 << PAGE_SHIFT
+PAGE_MASK = PAGE_SIZE - 1
+
+
+class _Page:
+    """Values, presence bitmap and update timestamps of one page."""
+
+    __slots__ = ("values", "present", "updated")
+
+    def __init__(self, bits: bool):
+        if bits:
+            self.values = bytearray(PAGE_SIZE // 8)
+        else:
+            self.values = array("H", bytes(2 * PAGE_SIZE))
+        self.present = bytearray(PAGE_SIZE // 8)
+        self.updated = array("d", bytes(8 * PAGE_SIZE))
+
+
+class RegisterStore:
+    """Sparse register or bit values keyed by absolute Modbus address."""
+
+    __slots__ = ("bits", "_pages")
+
+    def __init__(self, bits: bool = False):
+        self.bits = bits
+        self._pages = {}
+
+    def _page(self, number: int) -> _Page:
+        page = self._pages.get(number)
+        if page is None:
+            page = self._pages[number] = _Page(self.bits)
+        return page
+
+    def update(self, address: int, values, timestamp: float = None) -> list[int]:
+        """Store values read from consecutive addresses starting at address.
+
+        Returns the addresses whose value changed or that had no value yet.
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        changed = []
+        index = 0
+        count = len(values)
+        while index < count:
+            current = address + index
+            page = self._page(current >> PAGE_SHIFT)
+            offset = current & PAGE_MASK
+            chunk = min(count - index, PAGE_SIZE - offset)
+            end = offset + chunk
+            base = current - offset
+            for position, value in enumerate(values[index : index + chunk], offset):
+                byte, mask = position >> 3, 1 << (position & 7)
+                if self.bits:
+                    value = bool(value)
+                    old = bool(page.values[byte] & mask)
+                    if value:
+                        page.values[byte] |= mask
+                    else:
+                        page.values[byte] &= ~mask
+                else:
+                    old = page.values[position]
+                    page.values[position] = value
+                if old != value or not page.present[byte] & mask:
+                    page.present[byte] |= mask
+                    changed.append(base + position)
+            page.updated[offset:end] = array("d", [timestamp]) * chunk
+            index += chunk
+        return changed
+
+    def _locate(self, address: int):
+        page = self._pages.get(address >> PAGE_SHIFT)
+        if page is None:
+            return None, 0
+        offset = address & PAGE_MASK
+        if not page.present[offset >> 3] & (1 << (offset & 7)):
+            return None, 0
+        return page, offset
+
+    def get(self, address: int, default=None):
+        """Return the value at address, or default if it was never read."""
+        page, offset = self._locate(address)
+        if page is None:
+            return default
+        if self.bits:
+            return bool(page.values[offset >> 3] & (1 << (offset & 7)))
+        return page.values[offset]
+
+    def get_many(self, address: int, count: int):
+        """Return count consecutive values, or None if any is missing."""
+        values = []
+        for current in range(address, address + count):
+            value = self.get(current)
+            if value is None:
+                return None
+            values.append(value)
+        return values
+
+    def last_updated(self, address: int):
+        """Return the time the address was last read, or None."""
+        page, offset = self._locate(address)
+        if page is None:
+            return None
+        return page.updated[offset]
+
+    def addresses(self):
+        """Yield the addresses that hold a value."""
+        for number, page in self._pages.items():
+            base = number << PAGE_SHIFT
+            for offset in range(PAGE_SIZE):
+                if page.present[offset >> 3] & (1 << (offset & 7)):
+                    yield base + offset
+
+    def dump(self) -> dict[int, bytes]:
+        """Return the populated pages as bytes, keyed by page number."""
+        return {
+            number: bytes(page.values) + bytes(page.present) + page.updated.tobytes()
+            for number, page in self._pages.items()
+        }
+
+    def load(self, pages: dict[int, bytes]) -> None:
+        """Replace the values with pages returned by dump."""
+        loaded = {}
+        for number, data in pages.items():
+            page = _Page(self.bits)
+            values_size = PAGE_SIZE // 8 if self.bits else 2 * PAGE_SIZE
+            present_end = values_size + len(page.present)
+            if len(data) != present_end + len(page.updated) * 8:
+                raise ValueError(f"Page {number} has {len(data)} bytes")
+            if self.bits:
+                page.values[:] = data[:values_size]
+            else:
+                page.values = array("H", data[:values_size])
+            page.present[:] = data[values_size:present_end]
+            page.updated = array("d", data[present_end:])
+            loaded[number] = page
+        self._pages = loaded
+
+    def __contains__(self, address: int) -> bool:
+        return self._locate(address)[0] is not None
+
+    def __len__(self) -> int:
+        return sum(
+            bin(byte).count("1")
+            for page in self._pages.values()
+            for byte in page.present
+        )
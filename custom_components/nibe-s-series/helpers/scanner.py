@@ -0,0 +1,130 @@
+"""Scanning the address space of a unit for live registers"""
+
+import asyncio
+import logging
+
+# pylint: disable=relative-beyond-top-level
+from .probe import ExceptionResponse
+
+_LOGGER = logging.getLogger(__name__)
+
+# Blocks of at most MIN_BLOCK_SIZE addresses answered with an exception are
+# not split further, so a dead region costs a few requests, not one each.
+MIN_BLOCK_SIZE = 16
+
+# A block is read again after an error other than an exception response,
+# such as a timeout. MAX_ERRORS such errors in a row abort the scan.
+MAX_ERRORS = 3
+
+
+class RateLimiter:
+    """Space calls at least 1 / rate seconds apart."""
+
+    def __init__(self, rate: float):
+        self._interval = 1 / rate
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def async_wait(self) -> None:
+        """Wait until the next call is allowed."""
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            delay = self._next - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next = loop.time() + self._interval
+
+
+def merge_ranges(ranges) -> list[tuple[int, int]]:
+    """Merge (address, count) ranges that touch or overlap."""
+    merged = []
+    for address, count in sorted(ranges):
+        if merged and address <= merged[-1][0] + merged[-1][1]:
+            start, length = merged[-1]
+            merged[-1] = (start, max(length, address + count - start))
+        else:
+            merged.append((address, count))
+    return merged
+
+
+async def async_scan(
+    read,
+    register_type: str,
+    start: int,
+    end: int,
+    block_size: int,
+    concurrency: int,
+    rate: float,
+    min_block_size: int = MIN_BLOCK_SIZE,
+) -> list[tuple[int, int]]:
+    """Return the (address, count) ranges in [start, end) that answer.
+
+    The range is read in blocks of block_size. A block answered with an
+    exception is split in halves down to min_block_size addresses, and the
+    blocks that answer are merged. At most concurrency reads are
+    outstanding and at most rate are started per second. Other errors are
+    retried, and raised after MAX_ERRORS in a row.
+    """
+    queue = asyncio.Queue()
+    for address in range(start, end, block_size):
+        queue.put_nowait((address, min(block_size, end - address)))
+    live = []
+    limiter = RateLimiter(rate)
+    requests = 0
+    errors = 0
+    error = None
+
+    async def worker() -> None:
+        nonlocal requests, errors, error
+        while (block := await queue.get()) is not None:
+            address, count = block
+            try:
+                # After an error the remaining blocks are only drained
+                if error is not None:
+                    continue
+                await limiter.async_wait()
+                requests += 1
+                await read(register_type, address, count)
+            except ExceptionResponse:
+                errors = 0
+                if count > min_block_size:
+                    half = count // 2
+                    queue.put_nowait((address, half))
+                    queue.put_nowait((address + half, count - half))
+            except Exception as err:  # pylint: disable=broad-except
+                errors += 1
+                if errors >= MAX_ERRORS:
+                    error = err
+                else:
+                    _LOGGER.debug("Reading %s again: %s", block, err)
+                    queue.put_nowait(block)
+            else:
+                errors = 0
+                live.append((address, count))
+            finally:
+                queue.task_done()
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    try:
+        await queue.join()
+    except asyncio.CancelledError:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        raise
+    # A None ends each worker once every block is done
+    for _ in workers:
+        queue.put_nowait(None)
+    await asyncio.gather(*workers)
+    if error is not None:
+        raise error
+    ranges = merge_ranges(live)
+    _LOGGER.debug(
+        "Scanned %s %d-%d with %d requests: %s",
+        register_type,
+        start,
+        end - 1,
+        requests,
+        ranges,
+    )
+    return ranges
@@ -0,0 +1,107 @@
+"""Prioritized scheduling of Modbus requests on a connection"""
+
+import asyncio
+from collections import deque
+import heapq
+import itertools
+import logging
+
+from homeassistant.core import HomeAssistant, callback
+
+_LOGGER = logging.getLogger(__name__)
+
+# Number of recent queueing delays kept per priority for the metrics
+QUEUE_DELAY_SAMPLES = 200
+
+
+class RequestScheduler:
+    """Run Modbus transactions in priority order.
+
+    At most limit jobs run at once. Waiting jobs are started lowest priority
+    value first, in submission order within a priority. A write submitted
+    during a poll therefore waits for at most the transactions already on
+    the wire, never for the rest of the cycle.
+    """
+
+    def __init__(self, hass: HomeAssistant, limit: int = 1):
+        self._hass = hass
+        self.limit = max(1, limit)
+        self._running = 0
+        self._waiting = []
+        self._sequence = itertools.count()
+        self._delays = {}
+        self._counts = {}
+
+    @property
+    def in_flight(self) -> int:
+        """Return the number of jobs running."""
+        return self._running
+
+    @callback
+    def set_limit(self, limit: int) -> None:
+        """Change the number of jobs that may run at once."""
+        self.limit = max(1, limit)
+        self._dispatch()
+
+    async def async_submit(self, priority: int, job, *args):
+        """Run job(*args) once a slot is free and return its result."""
+        queued = self._hass.loop.time()
+        if self._running < self.limit and not self._waiting:
+            self._running += 1
+        else:
+            turn = self._hass.loop.create_future()
+            heapq.heappush(self._waiting, (priority, next(self._sequence), turn))
+            try:
+                await turn
+            except asyncio.CancelledError:
+                if turn.done() and not turn.cancelled():
+                    # The slot was granted before the cancellation arrived
+                    self._release()
+                raise
+        self._record(priority, self._hass.loop.time() - queued)
+        try:
+            return await job(*args)
+        finally:
+            self._release()
+
+    def _release(self) -> None:
+        self._running -= 1
+        self._dispatch()
+
+    @callback
+    def _dispatch(self) -> None:
+        """Grant free slots to the waiting jobs with the lowest priority value."""
+        while self._running < self.limit and self._waiting:
+            turn = heapq.heappop(self._waiting)[2]
+            if turn.done():
+                continue
+            self._running += 1
+            turn.set_result(None)
+
+    def _record(self, priority: int, delay: float) -> None:
+        delays = self._delays.get(priority)
+        if delays is None:
+            delays = self._delays[priority] = deque(maxlen=QUEUE_DELAY_SAMPLES)
+        delays.append(delay)
+        self._counts[priority] = self._counts.get(priority, 0) + 1
+
+    def metrics(self) -> dict[int, dict]:
+        """Return queueing delay statistics in milliseconds per priority."""
+        metrics = {}
+        for priority, delays in sorted(self._delays.items()):
+            ordered = sorted(delays)
+            metrics[priority] = {
+                "requests": self._counts[priority],
+                "mean_ms": round(1000 * sum(ordered) / len(ordered), 1),
+                "p95_ms": round(1000 * ordered[int(0.95 * (len(ordered) - 1))], 1),
+                "max_ms": round(1000 * ordered[-1], 1),
+            }
+        return metrics
+
+    @callback
+    def async_cancel(self) -> None:
+        """Cancel the jobs waiting for a slot."""
+        waiting, self._waiting = self._waiting, []
+        for _, _, turn in waiting:
+            if not turn.done():
+                turn.cancel()
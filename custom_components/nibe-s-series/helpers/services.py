@@ -0,0 +1,102 @@
+"""Services of the integration"""
+
+import logging
+
+import voluptuous as vol
+
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+)
+from homeassistant.exceptions import ServiceValidationError
+import homeassistant.helpers.config_validation as cv
+
+# pylint: disable=relative-beyond-top-level
+from ..const import COIL, DISCRETE_INPUTS, DOMAIN, HOLDING_REGISTERS, INPUT_REGISTERS
+from .scanner import MIN_BLOCK_SIZE
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_SCAN_REGISTERS = "scan_registers"
+
+ATTR_ENTRY_ID = "entry_id"
+ATTR_REGISTER_TYPE = "register_type"
+ATTR_START = "start"
+ATTR_END = "end"
+ATTR_BLOCK_SIZE = "block_size"
+ATTR_CONCURRENCY = "concurrency"
+ATTR_RATE = "rate"
+ATTR_MIN_BLOCK_SIZE = "min_block_size"
+
+REGISTER_TYPES = [INPUT_REGISTERS, HOLDING_REGISTERS, COIL, DISCRETE_INPUTS]
+
+
+def _start_below_end(data: dict) -> dict:
+    """Validate that the scanned range is not empty."""
+    if data[ATTR_START] >= data[ATTR_END]:
+        raise vol.Invalid(f"{ATTR_START} must be below {ATTR_END}")
+    return data
+
+
+SCAN_REGISTERS_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Required(ATTR_ENTRY_ID): cv.string,
+            vol.Required(ATTR_REGISTER_TYPE): vol.In(REGISTER_TYPES),
+            vol.Optional(ATTR_START, default=0): vol.All(
+                vol.Coerce(int), vol.Range(min=0, max=0xFFFF)
+            ),
+            vol.Optional(ATTR_END, default=10000): vol.All(
+                vol.Coerce(int), vol.Range(min=1, max=0x10000)
+            ),
+            vol.Optional(ATTR_BLOCK_SIZE, default=125): vol.All(
+                vol.Coerce(int), vol.Range(min=1, max=2000)
+            ),
+            vol.Optional(ATTR_CONCURRENCY, default=2): vol.All(
+                vol.Coerce(int), vol.Range(min=1, max=16)
+            ),
+            vol.Optional(ATTR_RATE, default=10): vol.All(
+                vol.Coerce(float), vol.Range(min=0.1, max=100)
+            ),
+            vol.Optional(ATTR_MIN_BLOCK_SIZE, default=MIN_BLOCK_SIZE): vol.All(
+                vol.Coerce(int), vol.Range(min=1, max=2000)
+            ),
+        }
+    ),
+    _start_below_end,
+)
+
+
+def async_register_services(hass: HomeAssistant) -> None:
+    """Register the services of the integration."""
+
+    async def async_scan_registers(call: ServiceCall) -> ServiceResponse:
+        """Scan a unit and return the address ranges of a type that answer."""
+        coordinator = hass.data.get(DOMAIN, {}).get(call.data[ATTR_ENTRY_ID])
+        if coordinator is None:
+            raise ServiceValidationError(
+                f"No loaded unit with entry id {call.data[ATTR_ENTRY_ID]}"
+            )
+        register_type = call.data[ATTR_REGISTER_TYPE]
+        found = await coordinator.async_scan(
+            register_type,
+            call.data[ATTR_START],
+            call.data[ATTR_END],
+            call.data[ATTR_BLOCK_SIZE],
+            call.data[ATTR_CONCURRENCY],
+            call.data[ATTR_RATE],
+            call.data[ATTR_MIN_BLOCK_SIZE],
+        )
+        return {
+            "ranges": {register_type: [[address, count] for address, count in found]}
+        }
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SCAN_REGISTERS,
+        async_scan_registers,
+        schema=SCAN_REGISTERS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
@@ -0,0 +1,88 @@
+"""Persistent snapshot of the register values"""
+
+import base64
+import binascii
+import logging
+import time
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+# pylint: disable=relative-beyond-top-level
+from ..const import DOMAIN
+from .register_store import RegisterStore
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+
+# Saves are batched, the pending save is also written when Home Assistant
+# stops so the snapshot holds the latest values.
+SAVE_DELAY = 300
+
+# Older snapshots are not restored, the values would be misleading.
+MAX_AGE = 24 * 3600
+
+
+class RegisterSnapshot:
+    """Last read register values of a unit, kept between restarts."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str, unit: str):
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.registers")
+        self._unit = unit
+        self._stores = {}
+        self._save_scheduled = False
+
+    async def async_load(self, stores: dict[str, RegisterStore]) -> bool:
+        """Load the snapshot into the register stores, return True if it did."""
+        data = await self._store.async_load()
+        if not data or data.get("unit") != self._unit:
+            return False
+        age = time.time() - data.get("saved", 0)
+        if age > MAX_AGE:
+            _LOGGER.debug("Register snapshot is %.0f s old, not restored", age)
+            return False
+        try:
+            pages = {
+                register_type: {
+                    int(number): base64.b64decode(page)
+                    for number, page in data["registers"][register_type].items()
+                }
+                for register_type in stores
+            }
+            for register_type, store in stores.items():
+                store.load(pages[register_type])
+        except (KeyError, TypeError, ValueError, binascii.Error) as err:
+            _LOGGER.warning("Ignoring invalid register snapshot: %s", err)
+            for store in stores.values():
+                store.load({})
+            return False
+        _LOGGER.debug("Restored register snapshot saved %.0f s ago", age)
+        return True
+
+    @callback
+    def async_schedule_save(self, stores: dict[str, RegisterStore]) -> None:
+        """Save the register stores within SAVE_DELAY seconds."""
+        self._stores = stores
+        if self._save_scheduled:
+            return
+        self._save_scheduled = True
+        self._store.async_delay_save(self._data, SAVE_DELAY)
+
+    def _data(self) -> dict:
+        self._save_scheduled = False
+        return {
+            "unit": self._unit,
+            "saved": time.time(),
+            "registers": {
+                register_type: {
+                    str(number): base64.b64encode(page).decode()
+                    for number, page in store.dump().items()
+                }
+                for register_type, store in self._stores.items()
+            },
+        }
+
+    async def async_remove(self) -> None:
+        """Remove the stored snapshot."""
+        await self._store.async_remove()
@@ -0,0 +1,357 @@
+"""Recording Modbus traffic to a log and replaying it"""
+
+import asyncio
+import logging
+import struct
+import time
+from collections import deque
+from types import SimpleNamespace
+from typing import NamedTuple
+
+from pymodbus.client import AsyncModbusTcpClient
+from pymodbus.exceptions import ModbusException
+from pymodbus.pdu import ExceptionResponse, ModbusPDU
+from pymodbus.pdu.bit_read_message import ReadCoilsResponse, ReadDiscreteInputsResponse
+from pymodbus.pdu.bit_write_message import (
+    WriteMultipleCoilsResponse,
+    WriteSingleCoilResponse,
+)
+from pymodbus.pdu.register_read_message import (
+    ReadHoldingRegistersResponse,
+    ReadInputRegistersResponse,
+)
+from pymodbus.pdu.register_write_message import (
+    WriteMultipleRegistersResponse,
+    WriteSingleRegisterResponse,
+)
+
+from homeassistant.core import HomeAssistant
+
+# pylint: disable=relative-beyond-top-level
+from ..const import COIL, DISCRETE_INPUTS, HOLDING_REGISTERS, INPUT_REGISTERS
+from .read_planner import ReadBlock
+
+_LOGGER = logging.getLogger(__name__)
+
+# A log starts with MAGIC and holds one record per request. A record is
+# RECORD followed by the values: the registers read or written as 16 bit
+# words, or the coils and inputs as bits packed from the lowest bit.
+MAGIC = b"NIBETRC1"
+RECORD = struct.Struct(">QIBBHHBH")
+
+# Status of a record, other values are the Modbus exception code. Requests
+# cancelled before the response arrived, as by a timeout around them, are
+# recorded as timed out.
+STATUS_OK = 0
+STATUS_TIMEOUT = 0xFE
+STATUS_ERROR = 0xFF
+
+# Bytes buffered before they are appended to the log
+FLUSH_SIZE = 4096
+
+# Client method, function code and whether the values are bits
+FUNCTIONS = {
+    "read_coils": (1, True),
+    "read_discrete_inputs": (2, True),
+    "read_holding_registers": (3, False),
+    "read_input_registers": (4, False),
+    "write_coil": (5, True),
+    "write_register": (6, False),
+    "write_coils": (15, True),
+    "write_registers": (16, False),
+}
+BIT_FUNCTIONS = {code for code, bits in FUNCTIONS.values() if bits}
+READ_CODES = {COIL: 1, DISCRETE_INPUTS: 2, HOLDING_REGISTERS: 3, INPUT_REGISTERS: 4}
+
+RESPONSES = {
+    1: ReadCoilsResponse,
+    2: ReadDiscreteInputsResponse,
+    3: ReadHoldingRegistersResponse,
+    4: ReadInputRegistersResponse,
+}
+
+
+class TrafficRecord(NamedTuple):
+    """One request and its response."""
+
+    # Monotonic time the request was sent, in nanoseconds
+    sent: int
+    # Microseconds until the response arrived
+    duration: int
+    slave: int
+    function_code: int
+    address: int
+    count: int
+    status: int
+    # Values read or written
+    values: list
+
+
+def _encode_values(function_code: int, values) -> bytes:
+    if function_code in BIT_FUNCTIONS:
+        packed = bytearray((len(values) + 7) // 8)
+        for index, value in enumerate(values):
+            if value:
+                packed[index // 8] |= 1 << (index % 8)
+        return bytes(packed)
+    return struct.pack(f">{len(values)}H", *values)
+
+
+def _decode_values(function_code: int, count: int, data: bytes) -> list:
+    if function_code in BIT_FUNCTIONS:
+        return [bool(data[index // 8] >> (index % 8) & 1) for index in range(count)]
+    return list(struct.unpack(f">{len(data) // 2}H", data))
+
+
+def _parse_request(name: str, args, kwargs) -> tuple[int, list]:
+    """Return the count and the written values of a client method call."""
+    if name.startswith("read"):
+        return kwargs.get("count", args[0] if args else 1), None
+    written = args[0] if args else kwargs.get("values", kwargs.get("value"))
+    if not isinstance(written, list):
+        written = [written]
+    return len(written), written
+
+
+def read_log(path: str) -> list[TrafficRecord]:
+    """Read the records of a traffic log."""
+    with open(path, "rb") as file:
+        data = file.read()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{path} is not a traffic log")
+    records = []
+    offset = len(MAGIC)
+    while offset + RECORD.size <= len(data):
+        fields = RECORD.unpack_from(data, offset)
+        offset += RECORD.size
+        size = fields[-1]
+        # A record cut short by a crash ends the log
+        if offset + size > len(data):
+            break
+        values = _decode_values(fields[3], fields[5], data[offset : offset + size])
+        records.append(TrafficRecord(*fields[:-1], values))
+        offset += size
+    return records
+
+
+class TrafficRecorder:
+    """Stand in for a client and append its requests and responses to a log.
+
+    Everything but the requests is passed on to the client.
+    """
+
+    def __init__(self, hass: HomeAssistant, client: AsyncModbusTcpClient, path: str):
+        self._hass = hass
+        self._client = client
+        self.path = path
+        self._buffer = bytearray()
+        self._flush_task = None
+
+    def __getattr__(self, name: str):
+        if name in FUNCTIONS:
+            return self._recorded(name)
+        return getattr(self._client, name)
+
+    def _recorded(self, name: str):
+        """Return the client method name, recording its requests."""
+        method = getattr(self._client, name)
+        function_code = FUNCTIONS[name][0]
+
+        async def request(address: int, *args, slave: int = 1, **kwargs):
+            count, written = _parse_request(name, args, kwargs)
+            return await self._async_record(
+                slave,
+                function_code,
+                address,
+                count,
+                written,
+                method(address, *args, slave=slave, **kwargs),
+            )
+
+        return request
+
+    async def async_pipelined_read(self, block: ReadBlock, slave: int) -> ModbusPDU:
+        """Read a block pipelined on the client, recording the request."""
+        return await self._async_record(
+            slave,
+            READ_CODES[block.register_type],
+            block.address,
+            block.count,
+            None,
+            self._client.async_pipelined_read(block, slave),
+        )
+
+    async def _async_record(
+        self, slave, function_code, address, count, written, request
+    ) -> ModbusPDU:
+        """Await a request and append it with its response to the log."""
+        sent = time.monotonic_ns()
+        values = written or []
+        status = None
+        try:
+            result = await request
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            status = STATUS_TIMEOUT
+            raise
+        except (ModbusException, OSError):
+            status = STATUS_ERROR
+            raise
+        else:
+            if isinstance(result, ExceptionResponse):
+                status = result.exception_code
+            elif result.isError():
+                status = STATUS_ERROR
+            else:
+                status = STATUS_OK
+                if written is None and function_code in BIT_FUNCTIONS:
+                    values = result.bits[:count]
+                elif written is None:
+                    values = result.registers
+            return result
+        finally:
+            if status is not None:
+                duration = (time.monotonic_ns() - sent) // 1000
+                self._append(
+                    TrafficRecord(
+                        sent,
+                        min(duration, 0xFFFFFFFF),
+                        slave,
+                        function_code,
+                        address,
+                        count,
+                        status,
+                        values,
+                    )
+                )
+
+    def _append(self, record: TrafficRecord) -> None:
+        """Buffer a record, flushing the buffer once it is large enough."""
+        data = _encode_values(record.function_code, record.values)
+        self._buffer += RECORD.pack(*record[:-1], len(data))
+        self._buffer += data
+        if len(self._buffer) >= FLUSH_SIZE and self._flush_task is None:
+            self._flush_task = self._hass.async_create_background_task(
+                self._async_flush(), "nibe traffic log"
+            )
+
+    async def _async_flush(self) -> None:
+        """Append the buffered records to the log, one write at a time."""
+        try:
+            while self._buffer:
+                data = bytes(self._buffer)
+                self._buffer.clear()
+                await self._hass.async_add_executor_job(self._write, data)
+        except OSError as err:
+            _LOGGER.error("Failed to write the traffic log %s: %s", self.path, err)
+        finally:
+            self._flush_task = None
+
+    def _write(self, data: bytes) -> None:
+        with open(self.path, "ab") as file:
+            if file.tell() == 0:
+                file.write(MAGIC)
+            file.write(data)
+
+    async def async_close(self) -> None:
+        """Write the records still buffered."""
+        if self._flush_task is not None:
+            await self._flush_task
+        await self._async_flush()
+
+
+class ReplayClient:
+    """Stand in for AsyncModbusTcpClient and answer from a traffic log.
+
+    A request is answered with the next recorded response to the same
+    slave, function, address and count, in order. When those run out the
+    last one is repeated, and requests that were never recorded are
+    answered with an illegal address exception. The log is read when the
+    client is created.
+
+    Responses follow the recorded timeline from the first connect, scaled
+    by speed: a response takes at least its recorded time and does not
+    arrive before its recorded time since the start of the log. A speed
+    of 0 answers at once.
+    """
+
+    # Replayed requests never wait for each other
+    pipelined = True
+
+    def __init__(self, path: str, speed: float = 1.0):
+        self.speed = speed
+        self.comm_params = SimpleNamespace(host=path, port=0, timeout_connect=3)
+        self.connected = False
+        # Monotonic time of the first connect, the start of the timeline
+        self._started = None
+        self._responses = {}
+        records = read_log(path)
+        self._first_sent = records[0].sent if records else 0
+        for record in records:
+            key = (record.slave, record.function_code, record.address, record.count)
+            self._responses.setdefault(key, deque()).append(record)
+
+    async def connect(self) -> bool:
+        """Connect, which always succeeds."""
+        if self._started is None:
+            self._started = time.monotonic()
+        self.connected = True
+        return True
+
+    def close(self) -> None:
+        """Disconnect."""
+        self.connected = False
+
+    def __getattr__(self, name: str):
+        if name not in FUNCTIONS:
+            raise AttributeError(name)
+        function_code = FUNCTIONS[name][0]
+
+        async def request(address: int, *args, slave: int = 1, **kwargs):
+            count, written = _parse_request(name, args, kwargs)
+            return await self._async_respond(
+                slave, function_code, address, count, written
+            )
+
+        return request
+
+    async def async_pipelined_read(self, block: ReadBlock, slave: int) -> ModbusPDU:
+        """Read a block."""
+        return await self._async_respond(
+            slave, READ_CODES[block.register_type], block.address, block.count, None
+        )
+
+    def _delay(self, record: TrafficRecord) -> float:
+        """Return the seconds until the response to a record is due."""
+        duration = record.duration / 1e6
+        offset = (record.sent - self._first_sent) / 1e9 + duration
+        due = self._started + offset / self.speed - time.monotonic()
+        return max(duration / self.speed, due)
+
+    async def _async_respond(
+        self, slave, function_code, address, count, written
+    ) -> ModbusPDU:
+        """Return the next recorded response to a request."""
+        if not self.connected:
+            raise ModbusException("Not connected")
+        records = self._responses.get((slave, function_code, address, count))
+        if not records:
+            return ExceptionResponse(function_code, 2, slave=slave)
+        record = records.popleft() if len(records) > 1 else records[0]
+        if self.speed:
+            await asyncio.sleep(self._delay(record))
+
+        if record.status == STATUS_TIMEOUT:
+            raise asyncio.TimeoutError
+        if record.status == STATUS_ERROR:
+            raise ModbusException(f"Recorded error at {address}")
+        if record.status != STATUS_OK:
+            return ExceptionResponse(function_code, record.status, slave=slave)
+        if function_code in RESPONSES:
+            return RESPONSES[function_code](record.values, slave=slave)
+        if function_code == 5:
+            return WriteSingleCoilResponse(address, written[0], slave=slave)
+        if function_code == 6:
+            return WriteSingleRegisterResponse(address, written[0], slave=slave)
+        if function_code == 15:
+            return WriteMultipleCoilsResponse(address, count, slave=slave)
+        return WriteMultipleRegistersResponse(address, count, slave=slave)
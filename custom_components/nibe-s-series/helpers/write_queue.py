@@ -0,0 +1,131 @@
+"""Coalescing queue for Modbus writes"""
+
+import asyncio
+import logging
+
+from homeassistant.core import HomeAssistant, callback
+
+# pylint: disable=relative-beyond-top-level
+from ..const import COIL, MAX_WRITE_BITS, MAX_WRITE_REGISTERS, WRITE_COALESCE_WINDOW
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def coalesce_writes(pending: dict) -> list[tuple[str, int, list]]:
+    """Group {(register_type, address): value} into contiguous write runs."""
+    runs = []
+    for register_type, address in sorted(pending):
+        value = pending[(register_type, address)]
+        limit = MAX_WRITE_BITS if register_type == COIL else MAX_WRITE_REGISTERS
+        if runs:
+            run_type, run_address, values = runs[-1]
+            if (
+                run_type == register_type
+                and run_address + len(values) == address
+                and len(values) < limit
+            ):
+                values.append(value)
+                continue
+        runs.append((register_type, address, [value]))
+    return runs
+
+
+class PartialWriteError(Exception):
+    """Raised by a write run when only some of its addresses failed.
+
+    errors maps the failed (register_type, address) keys to their error,
+    the other addresses of the run completed with result.
+    """
+
+    def __init__(self, result, errors: dict):
+        super().__init__(next(iter(errors.values())))
+        self.result = result
+        self.errors = errors
+
+
+class WriteQueue:
+    """Collect writes issued within a short window and send them together.
+
+    The last value written to an address within the window wins. Every
+    caller is answered once the transaction carrying its addresses is done,
+    with the first error of its own addresses.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, write, window: float = WRITE_COALESCE_WINDOW
+    ):
+        self._hass = hass
+        self._write = write
+        self._window = window
+        self._pending = {}
+        self._verify = set()
+        self._waiters = []
+        self._timer = None
+
+    def async_write(
+        self, register_type: str, address: int, values, verify: bool = True
+    ) -> asyncio.Future:
+        """Queue values for consecutive addresses and return a future."""
+        future = self._hass.loop.create_future()
+        keys = []
+        for offset, value in enumerate(values):
+            key = (register_type, address + offset)
+            self._pending[key] = value
+            if verify:
+                self._verify.add(key)
+            else:
+                self._verify.discard(key)
+            keys.append(key)
+        self._waiters.append((future, keys))
+        if self._timer is None:
+            self._timer = self._hass.loop.call_later(self._window, self._start_flush)
+        return future
+
+    @callback
+    def _start_flush(self) -> None:
+        self._timer = None
+        self._hass.async_create_task(self._async_flush())
+
+    async def _async_flush(self) -> None:
+        pending, self._pending = self._pending, {}
+        verify, self._verify = self._verify, set()
+        waiters, self._waiters = self._waiters, []
+        outcomes = {}
+        runs = coalesce_writes(pending)
+        _LOGGER.debug("Flushing %d writes as %d requests", len(pending), len(runs))
+        for register_type, address, values in runs:
+            keys = [(register_type, address + offset) for offset in range(len(values))]
+            errors = {}
+            try:
+                outcome = await self._write(
+                    register_type, address, values, [key in verify for key in keys]
+                )
+            except PartialWriteError as err:
+                outcome, errors = err.result, err.errors
+            except Exception as err:  # pylint: disable=broad-except
+                outcome = err
+            for key in keys:
+                outcomes[key] = errors.get(key, outcome)
+
+        for future, keys in waiters:
+            if future.done():
+                continue
+            results = [outcomes[key] for key in keys]
+            error = next((r for r in results if isinstance(r, Exception)), None)
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(results[-1])
+
+    @callback
+    def async_cancel(self) -> None:
+        """Drop queued writes that have not been sent."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for future, _keys in self._waiters:
+            if not future.done():
+                future.cancel()
+        self._pending = {}
+        self._verify = set()
+        self._waiters = []
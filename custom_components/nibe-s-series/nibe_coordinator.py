@@ -1,35 +1,489 @@
-from datetime import timedelta
+import asyncio
 import logging
-import async_timeout
-from pymodbus.client import AsyncModbusTcpClient
+import math
 from pymodbus.exceptions import ModbusException
 
+from homeassistant.core import CALLBACK_TYPE, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.debounce import Debouncer
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
-from .const import DEFAULT_SLAVE, NAME
+from .const import (
+    COIL,
+    DEFAULT_MAX_IN_FLIGHT,
+    DEFAULT_READ_GAP,
+    DEFAULT_SLAVE,
+    DISCRETE_INPUTS,
+    HOLDING_REGISTERS,
+    INPUT_REGISTERS,
+    NAME,
+    POLL_PRIORITIES,
+    POLL_TIER_FAST,
+    POLL_TIER_INTERVALS,
+    POLL_TIER_NORMAL,
+    POLL_TIERS,
+    PRIORITY_POLL_FAST,
+    PRIORITY_POLL_SLOW,
+    PRIORITY_READBACK,
+    PRIORITY_SCAN,
+    PRIORITY_WRITE,
+    READ_FUNCTIONS,
+)
+from .helpers.connection import ConnectionSupervisor
+from .helpers.decoder import DecodeTable
+from .helpers.pipeline import is_pipelined
+from .helpers.probe import async_probe, client_reader
+from .helpers.read_planner import ReadBlock, ReadPlanner, max_block_size, plan_reads
+from .helpers.register_map import RegisterMap
+from .helpers.register_store import RegisterStore
+from .helpers.scanner import async_scan
+from .helpers.snapshot import RegisterSnapshot
+from .helpers.traffic import TrafficRecorder
+from .helpers.write_queue import PartialWriteError, WriteQueue
 
 _LOGGER = logging.getLogger(__name__)
 
+# Delay before polling addresses of newly added entities, so that a whole
+# platform worth of entities is picked up by a single refresh.
+PLAN_REFRESH_COOLDOWN = 1.0
+
+# Written registers are read back right after the write. A differing value
+# is read again WRITE_VERIFY_RETRIES times, WRITE_VERIFY_DELAY apart, as the
+# unit may apply it late, before the write is reported as not applied.
+WRITE_VERIFY_RETRIES = 2
+WRITE_VERIFY_DELAY = 0.5
+
+# A failed block read is retried within the cycle, waiting BLOCK_RETRY_DELAY
+# before the first retry and doubling the wait up to BLOCK_RETRY_MAX_DELAY.
+BLOCK_RETRIES = 2
+BLOCK_RETRY_DELAY = 0.5
+BLOCK_RETRY_MAX_DELAY = 2.0
+# Longest wait for the response to a single block read, the client's own
+# timeout is retried internally and can hold the slot much longer
+BLOCK_READ_TIMEOUT = 5.0
+
+
+class WriteVerificationError(HomeAssistantError):
+    """Raised when the unit holds other values than were written to it."""
+
 
 class NibeCoordinator(DataUpdateCoordinator):
     """Coordinator to manage Modbus communication for Nibe integration."""
 
-    def __init__(self, hass, client: AsyncModbusTcpClient):
+    def __init__(
+        self,
+        hass,
+        connection: ConnectionSupervisor,
+        slave: int = DEFAULT_SLAVE,
+        read_gap: int = DEFAULT_READ_GAP,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        snapshot: RegisterSnapshot = None,
+        register_map: RegisterMap = None,
+    ):
         """Initialize the coordinator."""
         super().__init__(
             hass,
             _LOGGER,
             name=NAME,  # Name of the coordinator for logging purposes
-            update_interval=timedelta(seconds=15),  # Polling interval
+            # Polls are started by the phase aligned tick below
+            update_interval=None,
         )
-        self.client = client
+        # Ticks at the fastest tier, each tick reads the tiers that are due.
+        # The phase offsets the ticks of coordinators from each other.
+        self.tick_interval = POLL_TIER_INTERVALS[POLL_TIER_FAST].total_seconds()
+        self.phase = 0.0
+        self._tick_handle = None
+        self._closed = False
+        # Running register scans, cancelled when the coordinator closes
+        self._scans = set()
+        self.connection = connection
+        self.client = connection.client
+        self.slave = slave
+        # Entity descriptors of the model, read by the platforms
+        self.register_map = register_map
+        # Options of the config entry the coordinator was set up with
+        self.entry_options = {}
         self.paused = False
+        self.planner = ReadPlanner(read_gap)
+        self.max_in_flight = max_in_flight
+        self.scheduler = connection.scheduler
+        self._next_poll = {}
+        # (register_type, address, count) spans read once by the next poll,
+        # ahead of the tiers
+        self.startup_spans = []
+        self._address_listeners = {}
+        self._changed = set()
+        self.failed_blocks = set()
+        self.block_stats = {}
+        self._write_queue = WriteQueue(hass, self._async_write_run)
+        # Written values not yet confirmed by a read, keyed by
+        # (register_type, address). The value is (value, time the write
+        # completed or None while it is in flight).
+        self._pending_writes = {}
+        self._plan_refresh = Debouncer(
+            hass,
+            _LOGGER,
+            cooldown=PLAN_REFRESH_COOLDOWN,
+            immediate=False,
+            function=self.async_refresh,
+        )
+
+        # Registers storage, keyed by absolute Modbus address
+        self.input_registers = RegisterStore()
+        self.holding_registers = RegisterStore()
+        self.discrete_inputs = RegisterStore(bits=True)
+        self.coils = RegisterStore(bits=True)
+        self._stores = {
+            COIL: self.coils,
+            DISCRETE_INPUTS: self.discrete_inputs,
+            INPUT_REGISTERS: self.input_registers,
+            HOLDING_REGISTERS: self.holding_registers,
+        }
+
+        # Values restored from the snapshot stay stale until they are read
+        self.snapshot = snapshot
+        self.stale = set()
+
+        # Entity values, decoded from the registers read in each block
+        self.decoder = DecodeTable(self.registers)
+
+    @callback
+    def async_add_register_spans(
+        self,
+        owner,
+        spans,
+        tier: str = POLL_TIER_NORMAL,
+        update_callback: CALLBACK_TYPE = None,
+        decodings=(),
+    ):
+        """Add the (register_type, address, count) spans an entity reads.
 
-        # Registers storage
-        self.input_registers = []
-        self.holding_registers = []
-        self.discrete_inputs = []
-        self.coils = []
+        update_callback is called after a read in which any of the addresses
+        changed. decodings are added to the decode table. Returns a callback
+        that removes the spans again.
+        """
+        spans = list(spans)
+        decodings = list(decodings)
+        self.decoder.add(decodings)
+        if self.planner.add(owner, spans, tier):
+            self._next_poll.pop(tier, None)
+            self._plan_refresh.async_schedule_call()
+
+        keys = [
+            (register_type, address + offset)
+            for register_type, address, count in spans
+            for offset in range(count)
+        ]
+        if update_callback is not None:
+            for key in keys:
+                self._address_listeners.setdefault(key, []).append(update_callback)
+
+        @callback
+        def remove_spans() -> None:
+            self.planner.remove(owner)
+            self.decoder.remove(decodings)
+            if update_callback is None:
+                return
+            for key in keys:
+                listeners = self._address_listeners[key]
+                listeners.remove(update_callback)
+                if not listeners:
+                    del self._address_listeners[key]
+
+        return remove_spans
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Notify the listeners of changed addresses, then all listeners."""
+        changed, self._changed = self._changed, set()
+        callbacks = {}
+        for key in changed:
+            for update_callback in self._address_listeners.get(key, ()):
+                callbacks[update_callback] = None
+        for update_callback in callbacks:
+            update_callback()
+        super().async_update_listeners()
+
+    def registers(self, register_type: str) -> RegisterStore:
+        """Return the storage for a register type."""
+        return self._stores[register_type]
+
+    async def async_restore_snapshot(self) -> bool:
+        """Load the registers saved by the last run, return True if it did."""
+        if self.snapshot is None or not await self.snapshot.async_load(self._stores):
+            return False
+        self.stale = {
+            (register_type, address)
+            for register_type, store in self._stores.items()
+            for address in store.addresses()
+        }
+        return True
+
+    async def _async_read_block(self, block: ReadBlock):
+        """Read a planned block and store the values by address."""
+        sent = self.hass.loop.time()
+        if self.max_in_flight > 1 and is_pipelined(self.client):
+            result = await self.client.async_pipelined_read(block, self.slave)
+        else:
+            read = getattr(self.client, READ_FUNCTIONS[block.register_type])
+            async with asyncio.timeout(BLOCK_READ_TIMEOUT):
+                result = await read(block.address, count=block.count, slave=self.slave)
+        self.connection.record_response()
+        if result.isError():
+            raise ModbusException(f"{block} failed: {result}")
+        if block.register_type in (COIL, DISCRETE_INPUTS):
+            values = result.bits[: block.count]
+        else:
+            values = result.registers
+        changed = self.registers(block.register_type).update(block.address, values)
+        self.decoder.decode(block.register_type, block.address, values, changed)
+        self._changed.update((block.register_type, address) for address in changed)
+        if self.stale:
+            self.stale.difference_update(
+                (block.register_type, address)
+                for address in range(block.address, block.end)
+            )
+        if self._pending_writes:
+            self._reconcile_writes(block, sent)
+
+    def _reconcile_writes(self, block: ReadBlock, sent: float) -> None:
+        """Drop pending writes confirmed by a read sent after they completed."""
+        store = self.registers(block.register_type)
+        for address in range(block.address, block.end):
+            key = (block.register_type, address)
+            pending = self._pending_writes.get(key)
+            if pending is None or pending[1] is None or pending[1] > sent:
+                continue
+            del self._pending_writes[key]
+            if store.get(address) != pending[0]:
+                _LOGGER.debug(
+                    "%s %s reads %s after writing %s",
+                    block.register_type,
+                    address,
+                    store.get(address),
+                    pending[0],
+                )
+
+    async def _async_read_block_with_retry(
+        self, block: ReadBlock, priority: int
+    ) -> bool:
+        """Read a block, retrying with backoff. Returns False if it failed."""
+        stats = self.block_stats.setdefault(
+            block,
+            {"reads": 0, "errors": 0, "consecutive_errors": 0, "last_error": None},
+        )
+        delay = BLOCK_RETRY_DELAY
+        for attempt in range(BLOCK_RETRIES + 1):
+            stats["reads"] += 1
+            try:
+                await self.scheduler.async_submit(
+                    priority, self._async_read_block, block
+                )
+            except (ModbusException, asyncio.TimeoutError) as err:
+                stats["errors"] += 1
+                stats["last_error"] = str(err) or type(err).__name__
+                if attempt == BLOCK_RETRIES or not self.client.connected:
+                    break
+                _LOGGER.debug("Retrying %s in %.1fs: %s", block, delay, err)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, BLOCK_RETRY_MAX_DELAY)
+            else:
+                stats["consecutive_errors"] = 0
+                self._mark_block_read(block)
+                return True
+
+        stats["consecutive_errors"] += 1
+        if block not in self.failed_blocks:
+            _LOGGER.warning("Failed to read %s: %s", block, stats["last_error"])
+        self.failed_blocks.add(block)
+        return False
+
+    def _mark_block_read(self, block: ReadBlock) -> None:
+        """Forget failures of blocks covered by a successful read."""
+        self.failed_blocks = {
+            failed
+            for failed in self.failed_blocks
+            if failed.register_type != block.register_type
+            or failed.address < block.address
+            or failed.end > block.end
+        }
+
+    def _prune_failed_blocks(self) -> None:
+        """Forget the failures and stats of blocks no longer planned."""
+        planned = set(self.planner.plan())
+        self.failed_blocks &= planned
+        for block in self.block_stats.keys() - planned:
+            del self.block_stats[block]
+
+    async def _async_read_blocks(self, blocks) -> list[ReadBlock]:
+        """Read (block, priority) pairs through the request scheduler.
+
+        The scheduler keeps at most max_in_flight requests outstanding. Every
+        block succeeds or fails on its own. Returns the failed blocks.
+        """
+        results = await asyncio.gather(
+            *(
+                self._async_read_block_with_retry(block, priority)
+                for block, priority in blocks
+            )
+        )
+        return [block for (block, _), ok in zip(blocks, results) if not ok]
+
+    def spans_available(self, spans) -> bool:
+        """Return False if any of the spans was in a block that failed."""
+        for failed in self.failed_blocks:
+            for register_type, address, count in spans:
+                if (
+                    register_type == failed.register_type
+                    and address < failed.end
+                    and failed.address < address + count
+                ):
+                    return False
+        return True
+
+    async def async_probe(self, spans):
+        """Return the spans the unit implements, or None if it was not read."""
+        if not await self.connection.async_ensure_connected(self.slave):
+            return None
+        read = client_reader(self.client, self.slave)
+
+        async def scheduled_read(register_type: str, address: int, count: int):
+            return await self.scheduler.async_submit(
+                PRIORITY_POLL_SLOW, read, register_type, address, count
+            )
+
+        try:
+            return await async_probe(scheduled_read, spans, self.planner.max_gap)
+        except (ModbusException, asyncio.TimeoutError) as err:
+            _LOGGER.warning("Probing the registers of the unit failed: %s", err)
+            return None
+
+    async def async_scan(
+        self,
+        register_type: str,
+        start: int,
+        end: int,
+        block_size: int,
+        concurrency: int,
+        rate: float,
+        min_block_size: int,
+    ) -> list[tuple[int, int]]:
+        """Return the (address, count) ranges in [start, end) that answer.
+
+        Scan reads have the lowest priority, so polls and writes go first.
+        The scan is cancelled when the coordinator closes.
+        """
+        if not await self.connection.async_ensure_connected(self.slave):
+            raise HomeAssistantError("Modbus connection unavailable")
+        read = client_reader(self.client, self.slave)
+
+        async def timed_read(register_type: str, address: int, count: int):
+            async with asyncio.timeout(BLOCK_READ_TIMEOUT):
+                return await read(register_type, address, count)
+
+        async def scheduled_read(register_type: str, address: int, count: int):
+            return await self.scheduler.async_submit(
+                PRIORITY_SCAN, timed_read, register_type, address, count
+            )
+
+        scan = self.hass.async_create_task(
+            async_scan(
+                scheduled_read,
+                register_type,
+                start,
+                end,
+                min(block_size, max_block_size(register_type)),
+                concurrency,
+                rate,
+                min_block_size,
+            ),
+            f"{NAME} scan {register_type}",
+        )
+        self._scans.add(scan)
+        try:
+            return await scan
+        except (ModbusException, asyncio.TimeoutError) as err:
+            raise HomeAssistantError(f"Scanning {register_type} failed: {err}") from err
+        except asyncio.CancelledError:
+            if not self._closed:
+                raise
+            raise HomeAssistantError("Scan stopped, the unit was unloaded") from None
+        finally:
+            self._scans.discard(scan)
+
+    def spans_stale(self, spans) -> bool:
+        """Return True if any of the spans holds a restored, unread value."""
+        if not self.stale:
+            return False
+        return any(
+            (register_type, address) in self.stale
+            for register_type, start, count in spans
+            for address in range(start, start + count)
+        )
+
+    @callback
+    def set_phase(self, fraction: float) -> None:
+        """Offset the poll ticks by a fraction of the tick interval."""
+        self.phase = fraction * self.tick_interval
+        self._schedule_tick()
+
+    @callback
+    def _schedule_tick(self) -> None:
+        """Schedule the next tick on a boundary of the phase."""
+        if self._tick_handle is not None:
+            self._tick_handle.cancel()
+            self._tick_handle = None
+        if self._closed:
+            return
+        now = self.hass.loop.time()
+        ticks = math.floor((now - self.phase) / self.tick_interval) + 1
+        self._tick_handle = self.hass.loop.call_at(
+            self.phase + ticks * self.tick_interval, self._handle_tick
+        )
+
+    @callback
+    def _handle_tick(self) -> None:
+        self._tick_handle = None
+        self.hass.async_create_background_task(
+            self._async_tick(), f"{self.name} poll tick"
+        )
+
+    async def _async_tick(self) -> None:
+        try:
+            await self.async_refresh()
+        finally:
+            # A poll longer than the interval skips ticks instead of overlapping
+            self._schedule_tick()
+
+    def _due_tiers(self, now: float) -> list[str]:
+        """Return the polling tiers that are due at loop time now."""
+        # Ticks are not exact, allow a tier to be read half a tick early
+        tolerance = self.tick_interval / 2
+        due = []
+        starting = False
+        for tier in POLL_TIERS:
+            next_poll = self._next_poll.get(tier)
+            if next_poll is None:
+                # Tiers that were never read start one per tick, fastest
+                # first, so the first reads are spread over several cycles
+                if not starting:
+                    starting = True
+                    due.append(tier)
+            elif next_poll <= now + tolerance:
+                due.append(tier)
+        return due
+
+    def _startup_blocks(self) -> list[ReadBlock]:
+        """Plan the startup spans, which are only read once."""
+        spans, self.startup_spans = self.startup_spans, []
+        by_type = {}
+        for register_type, address, count in spans:
+            by_type.setdefault(register_type, []).append((address, count))
+        return [
+            block
+            for register_type, type_spans in by_type.items()
+            for block in plan_reads(register_type, type_spans, self.planner.max_gap)
+        ]
 
     async def _async_update_data(self):
         """Fetch data from Modbus device."""
@@ -37,70 +491,241 @@ class NibeCoordinator(DataUpdateCoordinator):
             _LOGGER.warning("Coordinator is paused, skipping data update.")
             return
 
-        try:
-            async with async_timeout.timeout(10):
-                if not self.client.connected:
-                    _LOGGER.info("Connecting to Modbus client...")
-                    await self.client.connect()
-
-                _LOGGER.debug("Fetching Modbus data...")
-                
-                # Read coils
-                coils_result = await self.client.read_coils(0, count=7, slave=DEFAULT_SLAVE)
-                self.coils = coils_result.bits
-
-                # Read discrete inputs
-                discrete_inputs_result = await self.client.read_discrete_inputs(
-                    0, count=54, slave=DEFAULT_SLAVE
-                )
-                self.discrete_inputs = discrete_inputs_result.bits
+        if not await self.connection.async_ensure_connected(self.slave):
+            raise UpdateFailed(
+                f"Modbus connection unavailable, retrying in "
+                f"{self.connection.retry_in(self.slave):.0f} s"
+            )
 
-                # Read input registers
-                input_registers_result = await self.client.read_input_registers(
-                    0, count=33, slave=DEFAULT_SLAVE
-                )
-                self.input_registers = input_registers_result.registers
-
-                # Read holding registers
-                holding_registers_result = await self.client.read_holding_registers(
-                    0, count=69, slave=DEFAULT_SLAVE
-                )
-                self.holding_registers = holding_registers_result.registers
+        try:
+            _LOGGER.debug("Fetching Modbus data...")
 
-                _LOGGER.debug("Modbus data successfully fetched.")
-                return
+            now = self.hass.loop.time()
+            tiers = self._due_tiers(now)
+            startup = self._startup_blocks()
+            blocks = [(block, PRIORITY_POLL_FAST) for block in startup]
+            blocks += [
+                (block, POLL_PRIORITIES[tier])
+                for tier in tiers
+                for block in self.planner.plan([tier])
+            ]
+            failed = await self._async_read_blocks(blocks)
+            # The entities track the blocks of their own tier, and blocks
+            # dropped by a re-plan would keep their spans unavailable
+            self.failed_blocks.difference_update(startup)
+            self._prune_failed_blocks()
+            for tier in tiers:
+                self._next_poll[tier] = now + POLL_TIER_INTERVALS[tier].total_seconds()
         except ModbusException as err:
             raise UpdateFailed(f"Modbus error: {err}") from err
         except Exception as err:
             raise UpdateFailed(f"Unexpected error: {err}") from err
 
-    async def write_register(self, address: int, value: int):
-        """Write to a holding register."""
-        try:
-            _LOGGER.debug("Writing value %s to register %s", value, address)
-            result = await self.client.write_register(address, value, slave=DEFAULT_SLAVE)
-            await self.async_refresh()
+        if blocks and len(failed) == len(blocks):
+            self.connection.record_failure(self.slave)
+            raise UpdateFailed(f"All {len(blocks)} block reads failed")
+        self.connection.record_success(self.slave)
+        if self.snapshot is not None:
+            self.snapshot.async_schedule_save(self._stores)
+        _LOGGER.debug(
+            "Modbus data fetched for %s, %d of %d blocks failed.",
+            tiers,
+            len(failed),
+            len(blocks),
+        )
+
+    async def _async_write_run(
+        self, register_type: str, address: int, values, verify: list[bool]
+    ):
+        """Send one coalesced write ahead of queued polls and verify it."""
+        result = await self.scheduler.async_submit(
+            PRIORITY_WRITE, self._async_send_write, register_type, address, values
+        )
+        if not any(verify):
             return result
-        except ModbusException as err:
-            _LOGGER.error("Failed to write to register %s: %s", address, err)
-            raise
+        try:
+            errors = await self._async_verify_write(
+                register_type, address, values, verify
+            )
+        finally:
+            self.async_update_listeners()
+        if errors:
+            raise PartialWriteError(result, errors)
+        return result
+
+    async def _async_send_write(self, register_type: str, address: int, values):
+        """Send one coalesced write."""
+        if register_type == COIL:
+            if len(values) == 1:
+                request = self.client.write_coil(address, values[0], slave=self.slave)
+            else:
+                request = self.client.write_coils(address, values, slave=self.slave)
+        elif len(values) == 1:
+            request = self.client.write_register(address, values[0], slave=self.slave)
+        else:
+            request = self.client.write_registers(address, values, slave=self.slave)
+        result = await request
+        if result.isError():
+            raise ModbusException(f"Write to {register_type} {address}: {result}")
+        completed = self.hass.loop.time()
+        for offset, value in enumerate(values):
+            key = (register_type, address + offset)
+            pending = self._pending_writes.get(key)
+            if pending is not None and pending[0] == value:
+                self._pending_writes[key] = (value, completed)
+        return result
+
+    async def _async_verify_write(
+        self, register_type: str, address: int, values, verify: list[bool]
+    ) -> dict:
+        """Read back the written addresses and compare the verified values.
+
+        Return a WriteVerificationError by (register_type, address) for each
+        verified address that holds another value.
+        """
+        block = ReadBlock(register_type, address, len(values))
+        store = self.registers(register_type)
+        mismatched = None
+        for attempt in range(WRITE_VERIFY_RETRIES + 1):
+            if attempt:
+                await asyncio.sleep(WRITE_VERIFY_DELAY)
+            try:
+                await self.scheduler.async_submit(
+                    PRIORITY_READBACK, self._async_read_block, block
+                )
+            except (ModbusException, asyncio.TimeoutError) as err:
+                _LOGGER.debug("Reading back %s failed: %s", block, err)
+                continue
+            actual = store.get_many(address, len(values))
+            if actual is None:
+                continue
+            mismatched = [
+                offset
+                for offset, value in enumerate(values)
+                if verify[offset] and actual[offset] != value
+            ]
+            if not mismatched:
+                return {}
+            _LOGGER.debug("%s reads %s after writing %s", block, actual, values)
+
+        if mismatched is None:
+            _LOGGER.warning("Could not read back the write to %s", block)
+            return {}
+        return {
+            (register_type, address + offset): WriteVerificationError(
+                f"Wrote {values[offset]} to {register_type} {address + offset}, "
+                f"but the unit holds {actual[offset]}. The value may be out of range."
+            )
+            for offset in mismatched
+        }
 
-    async def write_coil(self, address: int, value: bool):
-        """Write to a coil."""
+    def shadow_values(self, register_type: str, address: int, count: int = 1):
+        """Return the last written or read values, or None if any is unknown."""
+        store = self.registers(register_type)
+        values = []
+        for current in range(address, address + count):
+            pending = self._pending_writes.get((register_type, current))
+            value = store.get(current) if pending is None else pending[0]
+            if value is None:
+                return None
+            values.append(value)
+        return values
+
+    async def _async_write(
+        self,
+        register_type: str,
+        address: int,
+        values,
+        force: bool = False,
+        verify: bool = True,
+    ):
+        if register_type == COIL:
+            values = [bool(value) for value in values]
+        else:
+            values = [value & 0xFFFF for value in values]
+        # Forced and unverified writes are commands, such as a button or an
+        # alarm reset. They are always sent and the unit need not keep them.
+        command = force or not verify
+        shadow = self.shadow_values(register_type, address, len(values))
+        if not command and shadow == values:
+            _LOGGER.debug(
+                "Skipping write of %s to %s %s, already set",
+                values,
+                register_type,
+                address,
+            )
+            return None
+
+        # A command is not remembered as pending, the register may hold
+        # another value right after it and the same command may follow
+        keys = []
+        if not command:
+            keys = [(register_type, address + offset) for offset in range(len(values))]
+        for key, value in zip(keys, values):
+            self._pending_writes[key] = (value, None)
         try:
-            _LOGGER.debug("Writing value %s to coil %s", value, address)
-            result = await self.client.write_coil(address, value, slave=DEFAULT_SLAVE)
-            await self.async_refresh()
-            return result
-        except ModbusException as err:
-            _LOGGER.error("Failed to write to coil %s: %s", address, err)
+            _LOGGER.debug("Writing values %s to %s %s", values, register_type, address)
+            return await self._write_queue.async_write(
+                register_type, address, values, not command
+            )
+        except Exception as err:
+            for key, value in zip(keys, values):
+                if self._pending_writes.get(key) == (value, None):
+                    del self._pending_writes[key]
+            if isinstance(err, ModbusException):
+                _LOGGER.error(
+                    "Failed to write to %s %s: %s", register_type, address, err
+                )
             raise
 
+    async def write_register(
+        self, address: int, value: int, force: bool = False, verify: bool = True
+    ):
+        """Write to a holding register unless it already holds the value."""
+        return await self._async_write(
+            HOLDING_REGISTERS, address, [value], force, verify
+        )
+
+    async def write_coil(
+        self, address: int, value: bool, force: bool = False, verify: bool = True
+    ):
+        """Write to a coil unless it already holds the value."""
+        return await self._async_write(COIL, address, [value], force, verify)
+
+    async def write_registers(
+        self, address: int, values: list[int], force: bool = False, verify: bool = True
+    ):
+        """Write consecutive holding registers with a single request (FC16)."""
+        return await self._async_write(
+            HOLDING_REGISTERS, address, values, force, verify
+        )
+
+    async def write_coils(
+        self, address: int, values: list[bool], force: bool = False, verify: bool = True
+    ):
+        """Write consecutive coils with a single request (FC15)."""
+        return await self._async_write(COIL, address, values, force, verify)
+
+    def start_recording(self, path: str) -> None:
+        """Append the requests of this coordinator and their responses to path."""
+        _LOGGER.info("Recording Modbus traffic to %s", path)
+        self.client = TrafficRecorder(self.hass, self.connection.client, path)
+
+    async def async_stop_recording(self) -> None:
+        """Stop recording and write the records still buffered."""
+        if isinstance(self.client, TrafficRecorder):
+            recorder = self.client
+            self.client = self.connection.client
+            await recorder.async_close()
+
     def close(self):
-        """Close the Modbus client connection."""
-        if self.client.connected:
-            _LOGGER.info("Closing Modbus client connection.")
-            self.client.close()
+        """Stop polling and writing, the connection pool closes the client."""
+        self._closed = True
+        self._schedule_tick()
+        self._plan_refresh.async_cancel()
+        self._write_queue.async_cancel()
+        for scan in self._scans:
+            scan.cancel()
 
     def pause(self):
         """Pause data fetching by disconnecting the client."""
@@ -113,4 +738,5 @@ class NibeCoordinator(DataUpdateCoordinator):
         """Resume data fetching by reconnecting the client."""
         _LOGGER.info("Resuming Modbus communication.")
         self.paused = False
-        return await self.client.connect()
+        self.connection.reset(self.slave)
+        return await self.connection.async_ensure_connected(self.slave)
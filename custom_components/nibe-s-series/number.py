@@ -1,66 +1,77 @@
 """Number platform for Nibe."""
 import logging
+import time
 
 from homeassistant.components.number import NumberEntity, NumberDeviceClass
 from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN, NIBE_NUMBERS
+from .const import (
+    CONF_WRITE_DELAY,
+    CONF_WRITE_MAX_DELAY,
+    DEFAULT_WRITE_DELAY,
+    DEFAULT_WRITE_MAX_DELAY,
+    DOMAIN,
+    POLL_TIER_SLOW,
+)
 from .entity import NibeEntity
+from .helpers.general import get_parameter
 
 _LOGGER = logging.getLogger(__name__)
 
-NIBE_NUMBERS = [
-    {"name": "Degree Minutes", "address": 11, "register_type": "HOLDING_REGISTERS", "unit_of_measurement": None, "scale": 0.1, "min_value": -300, "max_value": 300, "step": 1},
-    {"name": "Cooling Degree Minutes", "address": 20, "register_type": "HOLDING_REGISTERS", "unit_of_measurement": None, "scale": 1, "min_value": -300, "max_value": 300, "step": 1},
-    {"name": "Heating Curve", "address": 26, "register_type": "HOLDING_REGISTERS", "unit_of_measurement": None, "scale": 1, "min_value": 0, "max_value": 100, "step": 1},
-    {"name": "Heating Curve Offset", "address": 30, "register_type": "HOLDING_REGISTERS", "unit_of_measurement": None, "scale": 1, "min_value": -10, "max_value": 10, "step": 0.5},
-    {"name": "Minimum Flow Temp", "address": 34, "register_type": "HOLDING_REGISTERS", "unit_of_measurement": "°C", "scale": 0.1, "min_value": 20, "max_value": 60, "step": 0.1},
-    {"name": "Maximum Flow Temp", "address": 38, "register_type": "HOLDING_REGISTERS", "unit_of_measurement": "°C", "scale": 0.1, "min_value": 30, "max_value": 80, "step": 0.1},
-    {"name": "Start Temp Hot Water (Normal)", "address": 59, "register_type": "HOLDING_REGISTERS", "unit_of_measurement": "°C", "scale": 0.1, "min_value": 35, "max_value": 60, "step": 0.1},
-    {"name": "Stop Temp Hot Water (Normal)", "address": 63, "register_type": "HOLDING_REGISTERS", "unit_of_measurement": "°C", "scale": 0.1, "min_value": 40, "max_value": 65, "step": 0.1},
-    {"name": "Period Time Heating", "address": 92, "register_type": "HOLDING_REGISTERS", "unit_of_measurement": "s", "scale": 1, "min_value": 10, "max_value": 300, "step": 1},
-    {"name": "Period Time Hot Water", "address": 93, "register_type": "HOLDING_REGISTERS", "unit_of_measurement": "s", "scale": 1, "min_value": 10, "max_value": 300, "step": 1},
-    {"name": "Period Time Cooling", "address": 94, "register_type": "HOLDING_REGISTERS", "unit_of_measurement": "s", "scale": 1, "min_value": 10, "max_value": 300, "step": 1},
-    {"name": "Degree Minutes Start Addition", "address": 679, "register_type": "HOLDING_REGISTERS", "unit_of_measurement": None, "scale": 1, "min_value": -500, "max_value": 0, "step": 1},
-    {"name": "Degree Minutes Start Compressor", "address": 97, "register_type": "HOLDING_REGISTERS", "unit_of_measurement": None, "scale": 1, "min_value": -500, "max_value": 0, "step": 1},
-    {"name": "Control Calculated Flow Temp (Heat)", "address": 5009, "register_type": "HOLDING_REGISTERS", "unit_of_measurement": "°C", "scale": 0.1, "min_value": 10, "max_value": 50, "step": 0.1},
-    {"name": "Control Calculated Flow Temp (Cooling)", "address": 5017, "register_type": "HOLDING_REGISTERS", "unit_of_measurement": "°C", "scale": 0.1, "min_value": 10, "max_value": 50, "step": 0.1},
-]
 
 async def async_setup_entry(hass: HomeAssistant, entry, async_add_devices):
     """Setup number platform."""
     _LOGGER.debug("Setting up Nibe numbers")
-    coordinator = hass.data[DOMAIN]["coordinator"]
+    coordinator = hass.data[DOMAIN][entry.entry_id]
 
-    numbers = [NibeNumber(coordinator, number, entry) for number in NIBE_NUMBERS]
+    numbers = [
+        NibeNumber(coordinator, number, entry)
+        for number in coordinator.register_map.descriptors("number")
+    ]
     async_add_devices(numbers)
 
 
 class NibeNumber(NibeEntity, NumberEntity):
     """Nibe number entity class."""
 
+    _default_poll_tier = POLL_TIER_SLOW
+
     def __init__(self, coordinator: CoordinatorEntity, idx, config_entry):
         _LOGGER.debug("Initializing NibeNumber: %s", idx["name"])
         super().__init__(coordinator, idx, config_entry)
         self.coordinator = coordinator
         self.address = idx["address"]
-        self.scale = idx.get("scale", 1)
-        self._attr_device_class = idx.get("device_class", None)
+        if idx.get("device_class") is not None:
+            self._attr_device_class = NumberDeviceClass(idx["device_class"])
         self._attr_native_unit_of_measurement = idx.get("unit_of_measurement", None)
         self._attr_native_min_value = idx.get("min_value", 0)
         self._attr_native_max_value = idx.get("max_value", 100)
         self._attr_native_step = idx.get("step", 1)
         self._attr_native_value = self._get_value()
 
+        # Trailing edge debounce of writes while a slider is dragged
+        self._write_delay = float(
+            get_parameter(config_entry, CONF_WRITE_DELAY, DEFAULT_WRITE_DELAY)
+        )
+        self._write_max_delay = float(
+            get_parameter(config_entry, CONF_WRITE_MAX_DELAY, DEFAULT_WRITE_MAX_DELAY)
+        )
+        self._pending_value = None
+        self._pending_since = None
+        self._write_timer = None
+
     def _get_value(self):
-        """Retrieve the scaled value from the coordinator."""
-        raw_value = self.coordinator.holding_registers.get(self.address, 0)
-        return round(raw_value * self.scale, 2)
+        """Retrieve the decoded value from the coordinator."""
+        return self._decoded_value()
 
     @callback
-    def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
+    def _handle_registers_update(self) -> None:
+        """Handle changed values in the registers of the entity."""
+        if self._pending_value is not None:
+            # Keep showing the value that is about to be written
+            return
         self._attr_native_value = self._get_value()
         _LOGGER.debug(
             "Updated NibeNumber %s: %s %s",
@@ -71,7 +82,45 @@ class NibeNumber(NibeEntity, NumberEntity):
         self.async_write_ha_state()
 
     async def async_set_native_value(self, value: float) -> None:
-        """Set the new value."""
+        """Show the new value and write it once it stops changing."""
         _LOGGER.debug("Setting NibeNumber value: %s", value)
-        raw_value = int(value / self.scale)
-        await self.coordinator.write_register(self.address, raw_value)
+        now = time.monotonic()
+        if self._pending_value is None:
+            self._pending_since = now
+        self._pending_value = value
+        self._attr_native_value = value
+        self.async_write_ha_state()
+
+        if self._write_timer is not None:
+            self._write_timer()
+        # Write at the latest write_max_delay after the first pending change
+        delay = min(
+            self._write_delay,
+            max(0.0, self._pending_since + self._write_max_delay - now),
+        )
+        self._write_timer = async_call_later(
+            self.hass, delay, self._async_write_pending
+        )
+
+    async def _async_write_pending(self, _now=None) -> None:
+        """Write the last value set since the previous write."""
+        self._write_timer = None
+        value, self._pending_value = self._pending_value, None
+        self._pending_since = None
+        try:
+            await self.coordinator.write_registers(
+                self.address,
+                self._decoding.encode(value),
+                verify=self.idx.get("verify", True),
+            )
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.error("Failed to set %s to %s: %s", self._attr_name, value, err)
+            self._attr_native_value = self._get_value()
+            self.async_write_ha_state()
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Drop a write that has not been sent."""
+        if self._write_timer is not None:
+            self._write_timer()
+            self._write_timer = None
+        await super().async_will_remove_from_hass()
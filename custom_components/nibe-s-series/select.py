@@ -5,31 +5,29 @@ from homeassistant.components.select import SelectEntity
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN, NIBE_SELECTS
+from .const import DOMAIN, POLL_TIER_SLOW
 from .entity import NibeEntity
 
 _LOGGER = logging.getLogger(__name__)
 
-NIBE_SELECTS = [
-    {"name": "Hot Water Demand", "address": 56, "register_type": "HOLDING_REGISTERS", "options": ["Small", "Medium", "Large", "Unused", "Smart Control"]},
-    {"name": "Operating Mode", "address": 237, "register_type": "HOLDING_REGISTERS", "options": ["Auto", "Manual", "Addition Only"]},
-    {"name": "Brine Pump Mode", "address": 96, "register_type": "HOLDING_REGISTERS", "options": ["Auto", "Manual"]},
-    {"name": "Heating Pump Mode", "address": 853, "register_type": "HOLDING_REGISTERS", "options": ["Auto", "Manual"]},
-    {"name": "Operational Priority", "address": 1028, "register_type": "INPUT_REGISTERS", "options": ["Off", "Hot Water", "Heating", "Pool", "Cooling"]},
-]
 
 async def async_setup_entry(hass: HomeAssistant, entry, async_add_devices):
     """Setup select platform."""
     _LOGGER.debug("Setting up NIBE selects")
 
-    coordinator = hass.data[DOMAIN]["coordinator"]
-    selects = [NibeSelect(coordinator, select, entry) for select in NIBE_SELECTS]
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    selects = [
+        NibeSelect(coordinator, select, entry)
+        for select in coordinator.register_map.descriptors("select")
+    ]
     async_add_devices(selects)
 
 
 class NibeSelect(NibeEntity, SelectEntity):
     """NIBE select entity class."""
 
+    _default_poll_tier = POLL_TIER_SLOW
+
     def __init__(self, coordinator: CoordinatorEntity, idx, config_entry):
         _LOGGER.debug("Initializing NibeSelect: %s", idx["name"])
         super().__init__(coordinator, idx, config_entry)
@@ -40,12 +38,14 @@ class NibeSelect(NibeEntity, SelectEntity):
 
     def _get_value(self):
         """Retrieve the current value from the coordinator."""
-        raw_value = self.coordinator.holding_registers.get(self.idx["address"], 0)
-        return self.idx["options"][raw_value] if raw_value < len(self.idx["options"]) else None
+        raw_value = self._decoded_value()
+        if raw_value is None or not 0 <= raw_value < len(self.idx["options"]):
+            return None
+        return self.idx["options"][raw_value]
 
     @callback
-    def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
+    def _handle_registers_update(self) -> None:
+        """Handle changed values in the registers of the entity."""
         self._attr_current_option = self._get_value()
         _LOGGER.debug("Updated NibeSelect %s: %s", self._attr_name, self._attr_current_option)
         self.async_write_ha_state()
@@ -55,4 +55,6 @@ class NibeSelect(NibeEntity, SelectEntity):
         _LOGGER.debug("Setting NibeSelect option: %s", option)
         if option in self._attr_options:
             value = self._attr_options.index(option)
-            await self.coordinator.write_register(self.idx["address"], value)
+            await self.coordinator.write_register(
+                self.idx["address"], value, verify=self.idx.get("verify", True)
+            )
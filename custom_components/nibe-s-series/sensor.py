@@ -1,5 +1,7 @@
 """Sensor platform for NIBE."""
 import logging
+import time
+
 from homeassistant.components.sensor import (
     SensorDeviceClass,
     SensorEntity,
@@ -7,64 +9,40 @@ from homeassistant.components.sensor import (
     SensorStateClass,
 )
 from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from pymodbus.client.mixin import ModbusClientMixin
 
-from .const import DOMAIN, INPUT_REGISTERS, HOLDING_REGISTERS
+from .const import DOMAIN
 from .entity import NibeEntity
+from .helpers.decoder import Decoding
 
 _LOGGER = logging.getLogger(__name__)
 
-NIBE_SENSORS = [
-    # Temperature sensors
-    {"name": "Outdoor Temperature (BT1)", "address": 1, "register_type": INPUT_REGISTERS, "unit_of_measurement": "°C", "device_class": SensorDeviceClass.TEMPERATURE, "state_class": SensorStateClass.MEASUREMENT, "scale": 0.1},
-    {"name": "Supply Temperature (BT2)", "address": 5, "register_type": INPUT_REGISTERS, "unit_of_measurement": "°C", "device_class": SensorDeviceClass.TEMPERATURE, "state_class": SensorStateClass.MEASUREMENT, "scale": 0.1},
-    {"name": "Return Temperature (BT3)", "address": 7, "register_type": INPUT_REGISTERS, "unit_of_measurement": "°C", "device_class": SensorDeviceClass.TEMPERATURE, "state_class": SensorStateClass.MEASUREMENT, "scale": 0.1},
-    {"name": "Hot Water Start (BT5)", "address": 2014, "register_type": INPUT_REGISTERS, "unit_of_measurement": "°C", "device_class": SensorDeviceClass.TEMPERATURE, "state_class": SensorStateClass.MEASUREMENT, "scale": 0.1},
-    {"name": "Hot Water Top (BT7)", "address": 8, "register_type": INPUT_REGISTERS, "unit_of_measurement": "°C", "device_class": SensorDeviceClass.TEMPERATURE, "state_class": SensorStateClass.MEASUREMENT, "scale": 0.1},
-    {"name": "Hot Water Charging (BT6)", "address": 9, "register_type": INPUT_REGISTERS, "unit_of_measurement": "°C", "device_class": SensorDeviceClass.TEMPERATURE, "state_class": SensorStateClass.MEASUREMENT, "scale": 0.1},
-    {"name": "Cold Carrier In (BT10)", "address": 10, "register_type": INPUT_REGISTERS, "unit_of_measurement": "°C", "device_class": SensorDeviceClass.TEMPERATURE, "state_class": SensorStateClass.MEASUREMENT, "scale": 0.1},
-    {"name": "Cold Carrier Out (BT11)", "address": 11, "register_type": INPUT_REGISTERS, "unit_of_measurement": "°C", "device_class": SensorDeviceClass.TEMPERATURE, "state_class": SensorStateClass.MEASUREMENT, "scale": 0.1},
-    {"name": "Flow Temperature (BT12)", "address": 12, "register_type": INPUT_REGISTERS, "unit_of_measurement": "°C", "device_class": SensorDeviceClass.TEMPERATURE, "state_class": SensorStateClass.MEASUREMENT, "scale": 0.1},
-    {"name": "Hot Gas Temperature (BT14)", "address": 13, "register_type": INPUT_REGISTERS, "unit_of_measurement": "°C", "device_class": SensorDeviceClass.TEMPERATURE, "state_class": SensorStateClass.MEASUREMENT, "scale": 0.1},
-    {"name": "Liquid Line Temperature (BT15)", "address": 14, "register_type": INPUT_REGISTERS, "unit_of_measurement": "°C", "device_class": SensorDeviceClass.TEMPERATURE, "state_class": SensorStateClass.MEASUREMENT, "scale": 0.1},
-    {"name": "Suction Gas Temperature (BT17)", "address": 16, "register_type": INPUT_REGISTERS, "unit_of_measurement": "°C", "device_class": SensorDeviceClass.TEMPERATURE, "state_class": SensorStateClass.MEASUREMENT, "scale": 0.1},
-    {"name": "Room Temperature 1 (BT50)", "address": 26, "register_type": INPUT_REGISTERS, "unit_of_measurement": "°C", "device_class": SensorDeviceClass.TEMPERATURE, "state_class": SensorStateClass.MEASUREMENT, "scale": 0.1},
-    {"name": "External Flow Temperature (BT25)", "address": 39, "register_type": INPUT_REGISTERS, "unit_of_measurement": "°C", "device_class": SensorDeviceClass.TEMPERATURE, "state_class": SensorStateClass.MEASUREMENT, "scale": 0.1},
-    {"name": "Compressor Temperature (BT29)", "address": 86, "register_type": INPUT_REGISTERS, "unit_of_measurement": "°C", "device_class": SensorDeviceClass.TEMPERATURE, "state_class": SensorStateClass.MEASUREMENT, "scale": 0.1},
-
-    # Flow and current sensors
-    {"name": "Flow Sensor (BF1)", "address": 40, "register_type": INPUT_REGISTERS, "unit_of_measurement": "l/m", "device_class": None, "state_class": SensorStateClass.MEASUREMENT, "scale": 0.1},
-    {"name": "Current BE3", "address": 46, "register_type": INPUT_REGISTERS, "unit_of_measurement": "A", "device_class": SensorDeviceClass.CURRENT, "state_class": SensorStateClass.MEASUREMENT, "scale": 0.1},
-    {"name": "Current BE2", "address": 48, "register_type": INPUT_REGISTERS, "unit_of_measurement": "A", "device_class": SensorDeviceClass.CURRENT, "state_class": SensorStateClass.MEASUREMENT, "scale": 0.1},
-    {"name": "Current BE1", "address": 50, "register_type": INPUT_REGISTERS, "unit_of_measurement": "A", "device_class": SensorDeviceClass.CURRENT, "state_class": SensorStateClass.MEASUREMENT, "scale": 0.1},
-
-    # Calculated and runtime measurements
-    {"name": "Calculated Flow Temp (Heating)", "address": 1017, "register_type": INPUT_REGISTERS, "unit_of_measurement": "°C", "device_class": SensorDeviceClass.TEMPERATURE, "state_class": SensorStateClass.MEASUREMENT, "scale": 0.1},
-    {"name": "Calculated Flow Temp (Cooling)", "address": 1567, "register_type": INPUT_REGISTERS, "unit_of_measurement": "°C", "device_class": SensorDeviceClass.TEMPERATURE, "state_class": SensorStateClass.MEASUREMENT, "scale": 0.1},
-    {"name": "Total Runtime Additions", "address": 1025, "register_type": INPUT_REGISTERS, "unit_of_measurement": "h", "device_class": None, "state_class": SensorStateClass.MEASUREMENT, "scale": 0.1},
-    {"name": "Flow Meter Hot Water", "address": 1575, "register_type": INPUT_REGISTERS, "unit_of_measurement": "kWh", "device_class": None, "state_class": SensorStateClass.MEASUREMENT, "scale": 0.1},
-    {"name": "Flow Meter Heat", "address": 1577, "register_type": INPUT_REGISTERS, "unit_of_measurement": "kWh", "device_class": None, "state_class": SensorStateClass.MEASUREMENT, "scale": 0.1},
-    {"name": "Flow Meter Pool", "address": 1581, "register_type": INPUT_REGISTERS, "unit_of_measurement": "kWh", "device_class": None, "state_class": SensorStateClass.MEASUREMENT, "scale": 0.1},
-    {"name": "Flow Meter Hot Water Compressor", "address": 1583, "register_type": INPUT_REGISTERS, "unit_of_measurement": "kWh", "device_class": None, "state_class": SensorStateClass.MEASUREMENT, "scale": 0.1},
-    {"name": "Flow Meter Heat Compressor", "address": 1585, "register_type": INPUT_REGISTERS, "unit_of_measurement": "kWh", "device_class": None, "state_class": SensorStateClass.MEASUREMENT, "scale": 0.1},
-
-    # Alarms and operational states
-    {"name": "Active Alarm", "address": 2195, "register_type": INPUT_REGISTERS, "unit_of_measurement": None, "device_class": None, "state_class": None, "scale": 1},
-    {"name": "Alarm Number", "address": 1975, "register_type": INPUT_REGISTERS, "unit_of_measurement": None, "device_class": None, "state_class": None, "scale": 1},
-    {"name": "Momentary Power Usage", "address": 2166, "register_type": INPUT_REGISTERS, "unit_of_measurement": "W", "device_class": SensorDeviceClass.POWER, "state_class": SensorStateClass.MEASUREMENT, "scale": 0.1},
-]
+
+def startup_decodings(register_map) -> list[Decoding]:
+    """Return the registers of the sensors read before setup."""
+    return [
+        Decoding.from_descriptor(sensor)
+        for sensor in register_map.descriptors("sensor")
+        if sensor.get("startup")
+    ]
+
 
 async def async_setup_entry(
     hass: HomeAssistant, entry, async_add_devices: AddEntitiesCallback
 ):
     """Setup NIBE platform."""
     _LOGGER.debug("Setting up NIBE sensors and controls")
-    coordinator = hass.data[DOMAIN]["coordinator"]
+    coordinator = hass.data[DOMAIN][entry.entry_id]
 
     # Add sensors
-    sensors = [NibeSensor(coordinator, sensor, entry) for sensor in NIBE_SENSORS]
+    sensors = [
+        NibeSensor(coordinator, sensor, entry)
+        for sensor in coordinator.register_map.descriptors("sensor")
+    ]
+    async_add_devices(sensors)
+
 
 class NibeSensor(NibeEntity, SensorEntity):
     """NIBE sensor class."""
@@ -75,23 +53,53 @@ class NibeSensor(NibeEntity, SensorEntity):
         self.coordinator = coordinator
         self.idx = idx
         self._attr_native_unit_of_measurement = idx["unit_of_measurement"]
-        self._attr_device_class = idx["device_class"]
-        self._attr_state_class = idx["state_class"]
+        if idx["device_class"] is not None:
+            self._attr_device_class = SensorDeviceClass(idx["device_class"])
+        if idx["state_class"] is not None:
+            self._attr_state_class = SensorStateClass(idx["state_class"])
         self._attr_native_value = self._get_value()
+        self._published_at = time.monotonic()
+        self._pending_publish = None
 
-def _get_value(self):
-    """Get the value from the coordinator."""
-    value = self.coordinator.input_registers.get(self.idx["address"])
-    if value is None:
-        _LOGGER.warning("Missing data for address: %s", self.idx["address"])
-        return None
-    scaled_value = ModbusClientMixin.convert_from_registers([value], ModbusClientMixin.DATATYPE.INT16)
-    return round(scaled_value * self.idx["scale"], 2)
+    def _get_value(self):
+        """Get the decoded value from the coordinator."""
+        return self._decoded_value()
+
+    def _is_meaningful(self, value, elapsed: float) -> bool:
+        """Return True if value differs enough from the published state."""
+        published = self._attr_native_value
+        heartbeat = self.idx.get("heartbeat")
+        if heartbeat is not None and elapsed >= heartbeat:
+            return True
+        threshold = max(
+            self.idx.get("deadband", 0),
+            self.idx.get("deadband_relative", 0) * abs(published),
+        )
+        return round(abs(value - published), 6) > threshold
 
     @callback
-    def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
-        self._attr_native_value = self._get_value()
+    def _handle_registers_update(self) -> None:
+        """Publish changed values that pass the deadband of the sensor."""
+        self._cancel_pending_publish()
+        value = self._get_value()
+        if value == self._attr_native_value:
+            return
+        if value is None or self._attr_native_value is None:
+            self._publish(value)
+            return
+        elapsed = time.monotonic() - self._published_at
+        min_interval = self.idx.get("min_interval", 0)
+        if elapsed < min_interval:
+            self._schedule_publish(min_interval - elapsed)
+        elif self._is_meaningful(value, elapsed):
+            self._publish(value)
+        elif "heartbeat" in self.idx:
+            self._schedule_publish(self.idx["heartbeat"] - elapsed)
+
+    @callback
+    def _publish(self, value) -> None:
+        self._attr_native_value = value
+        self._published_at = time.monotonic()
         _LOGGER.debug(
             "Updated sensor %s: %s %s",
             self._attr_name,
@@ -99,3 +107,26 @@ def _get_value(self):
             self._attr_native_unit_of_measurement,
         )
         self.async_write_ha_state()
+
+    @callback
+    def _schedule_publish(self, delay: float) -> None:
+        """Re-evaluate the latest value once delay seconds have passed."""
+        self._pending_publish = async_call_later(
+            self.hass, max(delay, 0), self._async_publish_pending
+        )
+
+    @callback
+    def _async_publish_pending(self, _now) -> None:
+        self._pending_publish = None
+        self._handle_registers_update()
+
+    @callback
+    def _cancel_pending_publish(self) -> None:
+        if self._pending_publish is not None:
+            self._pending_publish()
+            self._pending_publish = None
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Drop a scheduled publish."""
+        self._cancel_pending_publish()
+        await super().async_will_remove_from_hass()
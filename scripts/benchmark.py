@@ -0,0 +1,475 @@
+"""Benchmark the integration against simulated Nibe units.
+
+Each device is a pymodbus server with injected latency, run in a separate
+process so that it does not share the event loop or the measurements of
+the integration. A device implements the registers of the register map
+given with --model and answers requests for any other address with an
+illegal data address exception, as a unit does. The coordinators and entity platforms are driven through
+full poll cycles and the results are written as JSON, to be compared
+across commits:
+
+    python scripts/benchmark.py --devices 4 --cycles 200 --latency 20 --jitter 5
+"""
+
+import argparse
+import asyncio
+from datetime import timedelta
+import importlib
+import importlib.util
+import json
+import logging
+import math
+import multiprocessing
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COMPONENT = os.path.join(REPO, "custom_components", "nibe-s-series")
+PACKAGE = "custom_components.nibe"
+
+ADDRESSES = 0x10000
+
+# Data block of pymodbus serving each register type
+DATA_BLOCKS = {
+    "coil": "c",
+    "discrete_inputs": "d",
+    "holding_registers": "h",
+    "input_registers": "i",
+}
+
+_LOGGER = logging.getLogger("benchmark")
+
+
+def _device_host(index: int) -> str:
+    """Return the loopback address of a device, each has its own."""
+    return f"127.0.0.{index + 1}"
+
+
+def _mapped_addresses(model: str) -> dict[str, set[int]]:
+    """Return the addresses of a register map, by pymodbus data block."""
+    _import_component()
+    register_map = importlib.import_module(f"{PACKAGE}.helpers.register_map")
+    # pylint: disable=protected-access
+    compiled = register_map._compile(register_map._read_chain(model))
+    nibe_map = register_map.RegisterMap(compiled["model"], compiled["entities"])
+    spans = nibe_map.spans() | {
+        (idx["register_type"], idx["address"], 1)
+        for idx in nibe_map.descriptors("button")
+    }
+    addresses = {block: set() for block in DATA_BLOCKS.values()}
+    for register_type, address, count in spans:
+        addresses[DATA_BLOCKS[register_type]].update(range(address, address + count))
+    return addresses
+
+
+def run_simulator(args, ready) -> None:
+    """Serve the simulated units until the process is terminated."""
+    asyncio.run(_async_run_simulator(args, ready))
+
+
+async def _async_run_simulator(args, ready) -> None:
+    # pylint: disable=import-outside-toplevel
+    from pymodbus.datastore import (
+        ModbusSequentialDataBlock,
+        ModbusServerContext,
+        ModbusSlaveContext,
+    )
+    from pymodbus.server import ModbusTcpServer
+    from pymodbus.server.async_io import ModbusServerRequestHandler
+
+    class DrainingHandler(ModbusServerRequestHandler):
+        """Handle every complete request of a received chunk.
+
+        pymodbus handles one request per chunk, so pipelined requests that
+        arrive together would wait for the next chunk.
+        """
+
+        async def inner_handle(self):
+            await super().inner_handle()
+            while self.databuffer:
+                used, request = self.framer.processIncomingFrame(self.databuffer)
+                if not used:
+                    return
+                self.databuffer = self.databuffer[used:]
+                if request:
+                    self.execute(request, None)
+
+    class SimulatorServer(ModbusTcpServer):
+        """A Modbus TCP server that answers pipelined requests."""
+
+        def callback_new_connection(self):
+            return DrainingHandler(self)
+
+    class SimulatedUnit(ModbusSlaveContext):
+        """A unit answering after a delay, with drifting input registers.
+
+        Only the addresses of the register map are implemented.
+        """
+
+        def __init__(self, rng: random.Random, mapped: dict[str, set[int]]):
+            self._rng = rng
+            self._mapped = mapped
+            super().__init__(
+                di=ModbusSequentialDataBlock(
+                    0, [rng.random() < 0.5 for _ in range(ADDRESSES)]
+                ),
+                co=ModbusSequentialDataBlock(
+                    0, [rng.random() < 0.5 for _ in range(ADDRESSES)]
+                ),
+                # Temperatures in tenths of a degree and small settings
+                ir=ModbusSequentialDataBlock(
+                    0, [rng.randrange(500) for _ in range(ADDRESSES)]
+                ),
+                hr=ModbusSequentialDataBlock(
+                    0, [rng.randrange(5) for _ in range(ADDRESSES)]
+                ),
+                zero_mode=True,
+            )
+
+        def validate(self, fc_as_hex, address, count=1):
+            mapped = self._mapped[self.decode(fc_as_hex)]
+            return all(address + offset in mapped for offset in range(count))
+
+        async def _async_delay(self) -> None:
+            delay = args.latency + self._rng.uniform(-args.jitter, args.jitter)
+            await asyncio.sleep(max(0.0, delay) / 1000)
+
+        async def async_getValues(self, fc_as_hex, address, count=1):
+            await self._async_delay()
+            values = self.getValues(fc_as_hex, address, count)
+            if fc_as_hex == 4 and args.change_rate:
+                values = [
+                    (
+                        (value + self._rng.choice((-1, 1))) % 500
+                        if self._rng.random() < args.change_rate
+                        else value
+                    )
+                    for value in values
+                ]
+                self.setValues(fc_as_hex, address, values)
+            return values
+
+        async def async_setValues(self, fc_as_hex, address, values):
+            await self._async_delay()
+            self.setValues(fc_as_hex, address, values)
+
+    rng = random.Random(args.seed)
+    mapped = _mapped_addresses(args.model)
+    servers = []
+    for index in range(args.devices):
+        context = ModbusServerContext(slaves=SimulatedUnit(rng, mapped), single=True)
+        server = SimulatorServer(context, address=(_device_host(index), args.port))
+        await server.listen()
+        servers.append(server)
+    ready.set()
+    await asyncio.Event().wait()
+
+
+def _import_component():
+    """Import the integration as the package Home Assistant would load."""
+    parent = types.ModuleType("custom_components")
+    parent.__path__ = []
+    sys.modules.setdefault("custom_components", parent)
+    spec = importlib.util.spec_from_file_location(
+        PACKAGE,
+        os.path.join(COMPONENT, "__init__.py"),
+        submodule_search_locations=[COMPONENT],
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[PACKAGE] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def _percentiles(values: list[float]) -> dict[str, float]:
+    """Return the nearest rank percentiles of values."""
+    ordered = sorted(values)
+
+    def rank(percent: float) -> float:
+        return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+    return {
+        "p50": round(rank(50), 3),
+        "p95": round(rank(95), 3),
+        "p99": round(rank(99), 3),
+        "mean": round(sum(ordered) / len(ordered), 3),
+        "max": round(ordered[-1], 3),
+    }
+
+
+async def _async_setup(hass, args) -> list:
+    """Set up a coordinator with all entity platforms for each device."""
+    # pylint: disable=import-outside-toplevel
+    from homeassistant.helpers import (
+        area_registry,
+        category_registry,
+        device_registry,
+        entity_registry,
+        floor_registry,
+        label_registry,
+    )
+    from homeassistant.helpers.entity_platform import EntityPlatform
+
+    const = importlib.import_module(f"{PACKAGE}.const")
+    connection = importlib.import_module(f"{PACKAGE}.helpers.connection")
+    register_map = importlib.import_module(f"{PACKAGE}.helpers.register_map")
+    coordinator_module = importlib.import_module(f"{PACKAGE}.nibe_coordinator")
+
+    for registry in (
+        category_registry,
+        label_registry,
+        floor_registry,
+        area_registry,
+        device_registry,
+        entity_registry,
+    ):
+        await registry.async_load(hass)
+
+    pool = connection.ConnectionPool(hass)
+    hass.data[const.DOMAIN] = {}
+    nibe_map = await register_map.async_load_register_map(hass, args.model)
+    coordinators = []
+    for index in range(args.devices):
+        host = _device_host(index)
+        entry = types.SimpleNamespace(
+            entry_id=f"benchmark_{index}",
+            title=f"Nibe {index}",
+            data={
+                const.CONF_HOST_NAME: host,
+                const.CONF_HOST_PORT: args.port,
+                const.CONF_DEVICE_NAME: f"Nibe {index}",
+            },
+            options={},
+        )
+        coordinator = coordinator_module.NibeCoordinator(
+            hass,
+            pool.acquire(host, args.port, const.DEFAULT_SLAVE, args.max_in_flight),
+            read_gap=args.read_gap,
+            max_in_flight=args.max_in_flight,
+            register_map=nibe_map,
+        )
+        hass.data[const.DOMAIN][entry.entry_id] = coordinator
+        for domain in const.PLATFORMS:
+            module = importlib.import_module(f"{PACKAGE}.{domain}")
+            entity_platform = EntityPlatform(
+                hass=hass,
+                logger=_LOGGER,
+                domain=str(domain),
+                platform_name=const.DOMAIN,
+                platform=None,
+                scan_interval=timedelta(seconds=30),
+                entity_namespace=None,
+            )
+            entities = []
+            await module.async_setup_entry(hass, entry, entities.extend)
+            await entity_platform.async_add_entities(entities)
+        # The warmup cycles read the registers of the added entities instead
+        # of the refresh they scheduled, which would overlap the timed cycles
+        coordinator._plan_refresh.async_cancel()  # pylint: disable=protected-access
+        coordinators.append(coordinator)
+    return coordinators
+
+
+async def _async_cycle(hass, coordinators, poll_tiers) -> None:
+    """Poll every tier of every device once."""
+    for coordinator in coordinators:
+        # Make all tiers due, so each cycle is a full poll
+        # pylint: disable=protected-access
+        coordinator._next_poll = dict.fromkeys(poll_tiers, 0.0)
+    await asyncio.gather(*(coordinator.async_refresh() for coordinator in coordinators))
+    await hass.async_block_till_done()
+
+
+def _round_trips(coordinators) -> int:
+    return sum(
+        stats["reads"]
+        for coordinator in coordinators
+        for stats in coordinator.block_stats.values()
+    )
+
+
+async def async_benchmark(args) -> dict:
+    """Run the benchmark and return the results."""
+    # pylint: disable=import-outside-toplevel
+    from homeassistant.const import EVENT_STATE_CHANGED, EVENT_STATE_REPORTED
+    from homeassistant.core import HomeAssistant, callback
+
+    _import_component()
+    poll_tiers = importlib.import_module(f"{PACKAGE}.const").POLL_TIERS
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        await hass.config.async_set_time_zone("UTC")
+        state_writes = 0
+
+        @callback
+        def count_write(_event) -> None:
+            nonlocal state_writes
+            state_writes += 1
+
+        @callback
+        def every_state(_event_data) -> bool:
+            return True
+
+        hass.bus.async_listen(EVENT_STATE_CHANGED, count_write)
+        hass.bus.async_listen(
+            EVENT_STATE_REPORTED, count_write, event_filter=every_state
+        )
+
+        coordinators = await _async_setup(hass, args)
+        entities = len(hass.states.async_all())
+        for _ in range(args.warmup):
+            await _async_cycle(hass, coordinators, poll_tiers)
+
+        cycle_ms, loop_ms, round_trips, writes = [], [], [], []
+        for _ in range(args.cycles):
+            trips_before, writes_before = _round_trips(coordinators), state_writes
+            started, cpu_started = time.perf_counter(), time.thread_time()
+            await _async_cycle(hass, coordinators, poll_tiers)
+            cycle_ms.append((time.perf_counter() - started) * 1000)
+            loop_ms.append((time.thread_time() - cpu_started) * 1000)
+            round_trips.append(_round_trips(coordinators) - trips_before)
+            writes.append(state_writes - writes_before)
+
+        memory = None
+        if args.memory_cycles:
+            memory = await _async_measure_memory(hass, coordinators, poll_tiers, args)
+
+        failed = sum(len(coordinator.failed_blocks) for coordinator in coordinators)
+        for coordinator in coordinators:
+            coordinator.close()
+        await hass.async_stop(force=True)
+
+    return {
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "config": vars(args),
+        "entities": entities,
+        "failed_blocks": failed,
+        "cycle_ms": _percentiles(cycle_ms),
+        "loop_cpu_ms": _percentiles(loop_ms),
+        "round_trips_per_cycle": _percentiles(round_trips),
+        "state_writes_per_cycle": _percentiles(writes),
+        "memory": memory,
+    }
+
+
+async def _async_measure_memory(hass, coordinators, poll_tiers, args) -> dict:
+    """Trace the allocations of further cycles.
+
+    Tracing slows allocation down, so these cycles are not timed.
+    """
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    peaks = []
+    for _ in range(args.memory_cycles):
+        tracemalloc.reset_peak()
+        current = tracemalloc.get_traced_memory()[0]
+        await _async_cycle(hass, coordinators, poll_tiers)
+        peaks.append((tracemalloc.get_traced_memory()[1] - current) / 1024)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    component = tracemalloc.Filter(True, os.path.join(COMPONENT, "*"))
+    growth = after.filter_traces([component]).compare_to(
+        before.filter_traces([component]), "lineno"
+    )
+    total = after.compare_to(before, "filename")
+    return {
+        "cycles": args.memory_cycles,
+        "peak_kib_per_cycle": _percentiles(peaks),
+        "retained_kib": round(sum(stat.size_diff for stat in total) / 1024, 3),
+        "retained_blocks": sum(stat.count_diff for stat in total),
+        "top_component_growth": [
+            {
+                "location": f"{os.path.relpath(stat.traceback[0].filename, REPO)}"
+                f":{stat.traceback[0].lineno}",
+                "kib": round(stat.size_diff / 1024, 3),
+                "blocks": stat.count_diff,
+            }
+            for stat in growth[:5]
+            if stat.size_diff
+        ],
+    }
+
+
+def _commit():
+    """Return the checked out commit, if the repository is a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO,
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=1, help="simulated units")
+    parser.add_argument("--cycles", type=int, default=100, help="timed poll cycles")
+    parser.add_argument("--warmup", type=int, default=2, help="untimed first cycles")
+    parser.add_argument(
+        "--memory-cycles",
+        type=int,
+        default=20,
+        help="cycles traced for allocations after the timed ones, 0 to skip",
+    )
+    parser.add_argument("--latency", type=float, default=10, help="response ms")
+    parser.add_argument("--jitter", type=float, default=2, help="+/- response ms")
+    parser.add_argument(
+        "--change-rate",
+        type=float,
+        default=0.05,
+        help="chance an input register changes each time it is read",
+    )
+    parser.add_argument("--model", default="common", help="register map to load")
+    parser.add_argument(
+        "--read-gap",
+        type=int,
+        default=0,
+        help="unused addresses read between registers, which the devices reject",
+    )
+    parser.add_argument("--max-in-flight", type=int, default=1)
+    parser.add_argument("--port", type=int, default=15502)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the JSON here instead of stdout")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+    if not 1 <= args.devices <= 250:
+        parser.error("--devices must be between 1 and 250")
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.ERROR)
+    context = multiprocessing.get_context("spawn")
+    ready = context.Event()
+    simulator = context.Process(target=run_simulator, args=(args, ready), daemon=True)
+    simulator.start()
+    try:
+        if not ready.wait(60):
+            sys.exit("The simulator did not start")
+        results = asyncio.run(async_benchmark(args))
+    finally:
+        simulator.terminate()
+        simulator.join()
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
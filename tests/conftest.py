@@ -0,0 +1,45 @@
+"""Fixtures for the Nibe tests."""
+
+import importlib.util
+import os
+import sys
+import types
+
+import pytest
+
+from homeassistant.core import HomeAssistant
+
+COMPONENT = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "custom_components",
+    "nibe-s-series",
+)
+PACKAGE = "custom_components.nibe"
+
+
+def _import_component():
+    """Import the integration as the package Home Assistant would load."""
+    if PACKAGE in sys.modules:
+        return
+    parent = types.ModuleType("custom_components")
+    parent.__path__ = []
+    sys.modules.setdefault("custom_components", parent)
+    spec = importlib.util.spec_from_file_location(
+        PACKAGE,
+        os.path.join(COMPONENT, "__init__.py"),
+        submodule_search_locations=[COMPONENT],
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[PACKAGE] = module
+    spec.loader.exec_module(module)
+
+
+_import_component()
+
+
+@pytest.fixture
+async def hass(tmp_path):
+    """Return a Home Assistant instance without integrations."""
+    hass = HomeAssistant(str(tmp_path))
+    yield hass
+    await hass.async_stop(force=True)
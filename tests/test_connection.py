@@ -0,0 +1,83 @@
+"""Tests for the supervision of a shared connection."""
+
+import types
+
+from pymodbus.pdu.register_read_message import ReadInputRegistersResponse
+
+from custom_components.nibe.helpers.connection import (
+    BREAKER_THRESHOLD,
+    KEEPALIVE_IDLE,
+    ConnectionSupervisor,
+)
+
+
+class FakeClient:
+    """Connected Modbus client answering input register reads."""
+
+    connected = True
+    comm_params = types.SimpleNamespace(host="192.0.2.1")
+
+    def __init__(self):
+        self.closed = False
+        self.reads = 0
+
+    async def read_input_registers(self, address, count=1, slave=1):
+        self.reads += 1
+        return ReadInputRegistersResponse([0] * count, slave=slave)
+
+    def close(self):
+        self.closed = True
+        self.connected = False
+
+
+def _connection(hass, client, slaves):
+    connection = ConnectionSupervisor(hass, client)
+    connection.slaves.extend(slaves)
+    return connection
+
+
+async def test_healthy_unit_keeps_breaker_of_dead_unit(hass):
+    """Polls of one unit do not reset the failures of another."""
+    client = FakeClient()
+    connection = _connection(hass, client, [1, 2])
+
+    for _ in range(BREAKER_THRESHOLD):
+        connection.record_failure(2)
+        connection.record_success(1)
+
+    assert connection.breaker_open(2)
+    assert not connection.breaker_open(1)
+    assert await connection.async_ensure_connected(1)
+    assert not await connection.async_ensure_connected(2)
+    # The gateway still answers for unit 1
+    assert not client.closed
+
+
+async def test_connection_closed_when_no_unit_answers(hass):
+    """The shared client is closed once every unit has tripped its breaker."""
+    client = FakeClient()
+    connection = _connection(hass, client, [1, 2])
+
+    for _ in range(BREAKER_THRESHOLD):
+        connection.record_failure(1)
+    assert not client.closed
+    for _ in range(BREAKER_THRESHOLD):
+        connection.record_failure(2)
+    assert client.closed
+
+
+async def test_keepalive_follows_responses(hass):
+    """A connection is probed after a while without any response."""
+    client = FakeClient()
+    connection = _connection(hass, client, [1])
+    connection.record_response()
+
+    assert await connection.async_ensure_connected(1)
+    assert client.reads == 0
+
+    # Requests are sent, but none has been answered
+    connection._last_response -= KEEPALIVE_IDLE
+    assert await connection.async_ensure_connected(1)
+    assert client.reads == 1
+    assert await connection.async_ensure_connected(1)
+    assert client.reads == 1
@@ -0,0 +1,40 @@
+"""Tests for probing the registers of a unit."""
+
+from pymodbus.exceptions import ModbusException
+from pymodbus.pdu import ExceptionResponse
+from pymodbus.pdu.register_read_message import ReadInputRegistersResponse
+import pytest
+
+from custom_components.nibe.helpers.probe import async_probe, client_reader
+
+
+class FakeClient:
+    """Modbus client answering input register reads with an exception code."""
+
+    def __init__(self, exception_code, missing):
+        self.exception_code = exception_code
+        self.missing = missing
+
+    async def read_input_registers(self, address, count=1, slave=1):
+        if any(address <= missing < address + count for missing in self.missing):
+            return ExceptionResponse(0x04, self.exception_code, slave=slave)
+        return ReadInputRegistersResponse([1] * count, slave=slave)
+
+
+SPANS = {("input_registers", 1, 1), ("input_registers", 5, 1)}
+
+
+async def test_illegal_address_is_unsupported():
+    """Registers answered with an illegal data address are left out."""
+    read = client_reader(FakeClient(2, [5]), 1)
+
+    assert await async_probe(read, SPANS, 10) == {("input_registers", 1, 1)}
+
+
+@pytest.mark.parametrize("exception_code", [0, 0x0A, 0x0B])
+async def test_other_exceptions_abort_the_probe(exception_code):
+    """No response and gateway exceptions say nothing about the registers."""
+    read = client_reader(FakeClient(exception_code, [5]), 1)
+
+    with pytest.raises(ModbusException):
+        await async_probe(read, SPANS, 10)
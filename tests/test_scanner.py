@@ -0,0 +1,57 @@
+"""Tests for scanning the address space of a unit."""
+
+import asyncio
+
+import pytest
+
+from custom_components.nibe.helpers.probe import ExceptionResponse
+from custom_components.nibe.helpers.scanner import MAX_ERRORS, async_scan
+
+LIVE = set(range(0, 40)) | set(range(1000, 1010))
+
+
+def _reader(timeouts=0):
+    """Return a read function for LIVE and the list of its requests."""
+    requests = []
+
+    async def read(register_type, address, count):
+        requests.append((address, count))
+        if len(requests) <= timeouts:
+            raise asyncio.TimeoutError
+        if not all(current in LIVE for current in range(address, address + count)):
+            raise ExceptionResponse(f"{register_type} {address}")
+
+    return read, requests
+
+
+async def test_dead_blocks_are_split_down_to_the_minimum_size():
+    """Dead regions cost a few requests per block, not one per address."""
+    read, requests = _reader()
+
+    ranges = await async_scan(read, "input_registers", 0, 2000, 125, 4, 1000, 16)
+
+    found = {
+        address for start, count in ranges for address in range(start, start + count)
+    }
+    # Blocks of up to 16 addresses with a dead address in them are left out
+    assert found <= LIVE
+    assert len(LIVE - found) < 2 * 16
+    # Each of the 16 blocks costs at most 15 requests
+    assert len(requests) <= 16 * 15
+
+
+async def test_timeouts_are_retried():
+    """A timeout is read again instead of counting as a dead range."""
+    read, _ = _reader(timeouts=MAX_ERRORS - 1)
+
+    ranges = await async_scan(read, "input_registers", 0, 64, 64, 1, 1000, 8)
+
+    assert ranges == [(0, 40)]
+
+
+async def test_repeated_timeouts_abort_the_scan():
+    """A unit that stops answering ends the scan with the error."""
+    read, _ = _reader(timeouts=MAX_ERRORS)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await async_scan(read, "input_registers", 0, 64, 64, 1, 1000, 8)
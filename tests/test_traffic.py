@@ -0,0 +1,77 @@
+"""Tests for recording and replaying Modbus traffic."""
+
+import asyncio
+import time
+
+from pymodbus.pdu.register_read_message import ReadInputRegistersResponse
+import pytest
+
+from custom_components.nibe.helpers.traffic import (
+    STATUS_OK,
+    STATUS_TIMEOUT,
+    ReplayClient,
+    TrafficRecord,
+    TrafficRecorder,
+    read_log,
+)
+
+
+class SlowClient:
+    """Modbus client that takes a while to answer input register reads."""
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    async def read_input_registers(self, address, count=1, slave=1):
+        await asyncio.sleep(self.latency)
+        return ReadInputRegistersResponse([7] * count, slave=slave)
+
+
+async def test_timed_out_request_is_recorded(hass, tmp_path):
+    """A request cancelled by a timeout around it is logged as timed out."""
+    path = str(tmp_path / "nibe.trace")
+    recorder = TrafficRecorder(hass, SlowClient(0.05), path)
+
+    await recorder.read_input_registers(1, count=2, slave=1)
+    recorder._client.latency = 10
+    with pytest.raises(TimeoutError):
+        async with asyncio.timeout(0.05):
+            await recorder.read_input_registers(3, count=1, slave=1)
+    await recorder.async_close()
+
+    records = read_log(path)
+    assert [record.status for record in records] == [STATUS_OK, STATUS_TIMEOUT]
+    assert records[0].values == [7, 7]
+    assert records[1].duration >= 40000
+
+
+def _write_log(hass, path, records):
+    recorder = TrafficRecorder(hass, None, path)
+    for record in records:
+        recorder._append(record)
+    return recorder.async_close()
+
+
+@pytest.mark.parametrize("speed", [1, 2])
+async def test_replay_keeps_recorded_gaps(hass, tmp_path, speed):
+    """Responses are not answered before their recorded time in the log."""
+    path = str(tmp_path / "nibe.trace")
+    start = time.monotonic_ns()
+    await _write_log(
+        hass,
+        path,
+        [
+            TrafficRecord(start, 10000, 1, 4, 1, 1, STATUS_OK, [1]),
+            TrafficRecord(start + 400_000_000, 10000, 1, 4, 2, 1, STATUS_OK, [2]),
+        ],
+    )
+    client = ReplayClient(path, speed=speed)
+    await client.connect()
+
+    began = time.monotonic()
+    first = await client.read_input_registers(1, count=1, slave=1)
+    second = await client.read_input_registers(2, count=1, slave=1)
+    elapsed = time.monotonic() - began
+
+    assert (first.registers, second.registers) == ([1], [2])
+    assert 0.41 / speed - 0.02 <= elapsed < 0.41 / speed + 0.15
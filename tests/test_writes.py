@@ -0,0 +1,54 @@
+"""Tests for writes through the coordinator."""
+
+from pymodbus.pdu.register_read_message import ReadHoldingRegistersResponse
+from pymodbus.pdu.register_write_message import WriteSingleRegisterResponse
+
+from custom_components.nibe.helpers.connection import ConnectionSupervisor
+from custom_components.nibe.nibe_coordinator import NibeCoordinator
+
+
+class FakeClient:
+    """Modbus client whose holding registers read 0 until written."""
+
+    connected = True
+
+    def __init__(self):
+        self.registers = {}
+        self.writes = []
+
+    async def write_register(self, address, value, slave=1):
+        self.writes.append((address, value))
+        self.registers[address] = value
+        return WriteSingleRegisterResponse(address, value, slave=slave)
+
+    async def read_holding_registers(self, address, count=1, slave=1):
+        values = [self.registers.get(address + i, 0) for i in range(count)]
+        return ReadHoldingRegistersResponse(values, slave=slave)
+
+
+def _coordinator(hass, client):
+    return NibeCoordinator(hass, ConnectionSupervisor(hass, client))
+
+
+async def test_repeated_unverified_write_is_sent(hass):
+    """A command written again before the next poll is not skipped."""
+    client = FakeClient()
+    coordinator = _coordinator(hass, client)
+
+    await coordinator.write_register(22, 1, verify=False)
+    # The unit resets the register, the next poll has not read it yet
+    client.registers[22] = 0
+    await coordinator.write_register(22, 1, verify=False)
+
+    assert client.writes == [(22, 1), (22, 1)]
+
+
+async def test_repeated_verified_write_is_skipped(hass):
+    """A setting written again with the value it holds is not sent."""
+    client = FakeClient()
+    coordinator = _coordinator(hass, client)
+
+    await coordinator.write_register(26, 5)
+    await coordinator.write_register(26, 5)
+
+    assert client.writes == [(26, 5)]